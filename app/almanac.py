@@ -0,0 +1,122 @@
+import math
+from datetime import date, datetime
+from typing import Any, Dict, List
+import numpy as np
+import ephem
+
+try:
+    from .astro import julian_date, precess_from_j2000
+    from .catalog import STAR_CATALOG, STAR_CHUNK_SIZE, StarCatalog
+    from .ephemeris import SOLAR_SYSTEM_BODIES, compute_snapshot
+    from .utils import create_observer, format_utc
+except ImportError:
+    from astro import julian_date, precess_from_j2000
+    from catalog import STAR_CATALOG, STAR_CHUNK_SIZE, StarCatalog
+    from ephemeris import SOLAR_SYSTEM_BODIES, compute_snapshot
+    from utils import create_observer, format_utc
+
+
+# Earth rotation relative to the stars, in radians per solar day
+SIDEREAL_RATE = 2 * math.pi * 1.00273790935
+
+# Altitude of a star's centre at rising/setting: the horizon lowered by refraction
+STAR_HORIZON = math.radians(-34.0 / 60.0)
+
+# PyEphem cannot search rise/set for Jupiter's moons; they stay within a few
+# arcminutes of Jupiter, so they share its events
+GALILEAN_MOONS = ("Io", "Europa", "Ganymede", "Callisto")
+
+
+def _event(day_start: ephem.Date, offset_days: float) -> str:
+    return format_utc(ephem.Date(float(day_start) + offset_days))
+
+
+def solar_system_events(observer: ephem.Observer, day_start: ephem.Date) -> List[Dict[str, Any]]:
+    """Rise/transit/set of each solar-system body within the UTC day, via PyEphem searches"""
+    day_end = ephem.Date(day_start + 1)
+    snapshot = compute_snapshot(ephem.Date(day_start + 0.5))
+    events = {}
+    rows = []
+    for i, (name, body_class, body_type) in enumerate(SOLAR_SYSTEM_BODIES):
+        if name in GALILEAN_MOONS:
+            row = dict(events["Jupiter"])
+        else:
+            body = body_class()
+            row = {"rise": None, "transit": None, "set": None, "always_up": False, "never_up": False}
+            for key, search in (("rise", observer.next_rising), ("transit", observer.next_transit), ("set", observer.next_setting)):
+                observer.date = day_start
+                try:
+                    when = search(body)
+                except ephem.AlwaysUpError:
+                    row["always_up"] = True
+                    continue
+                except ephem.NeverUpError:
+                    row["never_up"] = True
+                    continue
+                if when < day_end:
+                    row[key] = format_utc(when)
+            events[name] = row
+        rows.append({"name": name, "type": body_type, "magnitude": round(float(snapshot.magnitude[i]), 2), **row})
+    return rows
+
+
+def star_events(catalog: StarCatalog, latitude: float, longitude: float, day_start: ephem.Date, limit: int) -> List[Dict[str, Any]]:
+    """
+    Rise/transit/set of the brightest `limit` stars that ever rise, from the
+    closed-form hour angle at which a star of declination dec crosses the
+    horizon at latitude lat: cos(H0) = (sin(h0) - sin(lat) sin(dec)) / (cos(lat) cos(dec)).
+    """
+    observer = create_observer(latitude, longitude)
+    observer.date = day_start
+    local_sidereal_start = float(observer.sidereal_time())
+    lat = math.radians(latitude)
+
+    # Only stars that can rise at this latitude are walked
+    jd = julian_date(day_start + 0.5)
+    risable, _ = catalog.risable_rows(latitude, latitude, jd)
+    
+    rows = []
+    for start in range(0, len(risable), STAR_CHUNK_SIZE):
+        chunk = risable[start:start + STAR_CHUNK_SIZE]
+        ra, dec = precess_from_j2000(catalog.ra[chunk], catalog.dec[chunk], jd)
+        cos_h0 = (math.sin(STAR_HORIZON) - math.sin(lat) * np.sin(dec)) / (math.cos(lat) * np.cos(dec))
+        h0 = np.arccos(np.clip(cos_h0, -1.0, 1.0))
+
+        # First time after the day starts at which the local hour angle reaches
+        # -H0 (rise), 0 (transit) and +H0 (set); a sidereal day is shorter
+        # than a solar day, so each one falls within the UTC day
+        transit = np.mod(ra - local_sidereal_start, 2 * math.pi) / SIDEREAL_RATE
+        rise = np.mod(ra - h0 - local_sidereal_start, 2 * math.pi) / SIDEREAL_RATE
+        setting = np.mod(ra + h0 - local_sidereal_start, 2 * math.pi) / SIDEREAL_RATE
+
+        for i, row in enumerate(chunk):
+            if cos_h0[i] > 1.0:
+                # Never rises at this latitude
+                continue
+            always_up = bool(cos_h0[i] < -1.0)
+            rows.append({
+                "name": catalog.name(row),
+                "type": "star",
+                "magnitude": round(float(catalog.magnitude[row]), 2),
+                "rise": None if always_up else _event(day_start, float(rise[i])),
+                "transit": _event(day_start, float(transit[i])),
+                "set": None if always_up else _event(day_start, float(setting[i])),
+                "always_up": always_up,
+                "never_up": False,
+            })
+            if len(rows) >= limit:
+                return rows
+    return rows
+
+
+def compute_almanac(latitude: float, longitude: float, day: date, max_stars: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Event table for one UTC day at one location (usually a cell centre):
+    every solar-system body, plus the brightest `max_stars` stars that rise.
+    """
+    day_start = ephem.Date(datetime(day.year, day.month, day.day))
+    observer = create_observer(latitude, longitude)
+    return {
+        "solar_system": solar_system_events(observer, day_start),
+        "stars": star_events(STAR_CATALOG, latitude, longitude, day_start, max_stars),
+    }
@@ -0,0 +1,76 @@
+import math
+import numpy as np
+import ephem
+
+# Offset between PyEphem's Dublin Julian Date and the standard Julian Date
+DUBLIN_JD_OFFSET = 2415020.0
+J2000_JD = 2451545.0
+
+
+def julian_date(date) -> float:
+    """Convert an ephem.Date (or anything ephem.Date accepts) to a Julian Date"""
+    return float(ephem.Date(date)) + DUBLIN_JD_OFFSET
+
+
+def precession_matrix(jd: float) -> np.ndarray:
+    """
+    Rotation matrix taking J2000 mean equatorial vectors to the mean equator
+    and equinox of the given Julian Date (IAU 1976 precession).
+    """
+    t = (jd - J2000_JD) / 36525.0
+    arcsec = math.pi / (180.0 * 3600.0)
+    zeta = (2306.2181 * t + 0.30188 * t ** 2 + 0.017998 * t ** 3) * arcsec
+    z = (2306.2181 * t + 1.09468 * t ** 2 + 0.018203 * t ** 3) * arcsec
+    theta = (2004.3109 * t - 0.42665 * t ** 2 - 0.041833 * t ** 3) * arcsec
+
+    cz, sz = math.cos(zeta), math.sin(zeta)
+    cZ, sZ = math.cos(z), math.sin(z)
+    ct, st = math.cos(theta), math.sin(theta)
+    return np.array([
+        [cz * ct * cZ - sz * sZ, -sz * ct * cZ - cz * sZ, -st * cZ],
+        [cz * ct * sZ + sz * cZ, -sz * ct * sZ + cz * cZ, -st * sZ],
+        [cz * st, -sz * st, ct],
+    ])
+
+
+def precess_from_j2000(ra: np.ndarray, dec: np.ndarray, jd: float):
+    """Precess J2000 RA/Dec arrays (radians) to the equinox of date"""
+    cos_dec = np.cos(dec)
+    vectors = np.stack((cos_dec * np.cos(ra), cos_dec * np.sin(ra), np.sin(dec)))
+    x, y, z = precession_matrix(jd) @ vectors
+    ra_date = np.mod(np.arctan2(y, x), 2 * math.pi)
+    dec_date = np.arcsin(np.clip(z, -1.0, 1.0))
+    return ra_date, dec_date
+
+
+def equatorial_to_horizontal(hour_angle, dec, latitude):
+    """
+    Convert hour angle/declination (radians) to altitude/azimuth (radians)
+    for an observer at the given latitude (radians). Azimuth is measured
+    from North through East, as PyEphem does. Works on scalars and on
+    broadcastable arrays (e.g. one row per observer, one column per star).
+    """
+    sin_lat, cos_lat = np.sin(latitude), np.cos(latitude)
+    sin_dec, cos_dec = np.sin(dec), np.cos(dec)
+    cos_ha = np.cos(hour_angle)
+
+    sin_alt = sin_lat * sin_dec + cos_lat * cos_dec * cos_ha
+    alt = np.arcsin(np.clip(sin_alt, -1.0, 1.0))
+    az = np.arctan2(
+        -cos_dec * np.sin(hour_angle),
+        cos_lat * sin_dec - sin_lat * cos_dec * cos_ha,
+    )
+    return alt, np.mod(az, 2 * math.pi)
+
+
+def refraction(alt_deg, pressure=1010.0, temperature=15.0):
+    """
+    Atmospheric refraction in degrees for a true (airless) altitude in
+    degrees, using Saemundsson's formula scaled for pressure and temperature.
+    Objects more than a degree below the horizon are left unrefracted.
+    """
+    alt_deg = np.asarray(alt_deg, dtype=float)
+    h = np.maximum(alt_deg, -1.0)
+    r = 1.02 / np.tan(np.radians(h + 10.3 / (h + 5.11))) / 60.0
+    r = r * (np.asarray(pressure) / 1010.0) * (283.0 / (273.0 + np.asarray(temperature)))
+    return np.where(alt_deg > -1.0, r, 0.0)
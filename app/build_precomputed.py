@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+Offline builder for the precomputed observation store.
+
+Computes /api/bright-objects observations for a list of popular locations
+(by default the quick-city buttons of the web page) at a fixed time step
+over the coming days, and writes them to an SQLite file the API serves from:
+
+    python -m app.build_precomputed observations.db --days 3 --step-minutes 1
+    PRECOMPUTED_STORE_PATH=observations.db python main.py
+
+Runs are incremental: rows already stored are kept, rows older than the
+start of the window are pruned. Running the builder periodically (from cron,
+or with --every HOURS) therefore rolls the window forward.
+"""
+import argparse
+import math
+import sys
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+import ephem
+
+try:
+    from .locations import QUICK_CITIES
+    from .main import RESPONSE_CACHE_LATLON_DECIMALS, RESPONSE_CACHE_TIME_BUCKET, compute_observations
+    from .precomputed import PrecomputedStore
+    from .utils import format_utc
+except ImportError:
+    from locations import QUICK_CITIES
+    from main import RESPONSE_CACHE_LATLON_DECIMALS, RESPONSE_CACHE_TIME_BUCKET, compute_observations
+    from precomputed import PrecomputedStore
+    from utils import format_utc
+
+
+# Observations computed per call, sharing the vectorized star pass
+BUILD_BATCH_SIZE = 200
+
+
+def parse_location(value: str) -> Tuple[float, float]:
+    try:
+        latitude, longitude = (float(part) for part in value.split(","))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected LAT,LON, got {value!r}")
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise argparse.ArgumentTypeError(f"Location out of range: {value}")
+    return latitude, longitude
+
+
+def refresh(store: PrecomputedStore, locations: List[Tuple[float, float]], days: float, step_minutes: float) -> Tuple[int, int]:
+    """
+    Fill in the missing grid points from the current time bucket to `days`
+    ahead and prune the ones before it. Returns (rows added, rows pruned).
+    Each grid point is computed at the middle of its time bucket.
+    """
+    bucket_days = store.bucket_seconds / 86400.0
+    step = max(1, int(round(step_minutes * 60.0 / store.bucket_seconds)))
+    first = math.floor(float(ephem.now()) / bucket_days)
+    last = first + int(days * 86400.0 / store.bucket_seconds)
+    pruned = store.prune(ephem.Date(first * bucket_days))
+
+    added = 0
+    pending = []
+    for latitude, longitude in locations:
+        stored = store.buckets(latitude, longitude)
+        for bucket in range(first - first % step, last + 1, step):
+            if bucket >= first and bucket not in stored:
+                pending.append((latitude, longitude, ephem.Date((bucket + 0.5) * bucket_days)))
+
+    for start in range(0, len(pending), BUILD_BATCH_SIZE):
+        chunk = pending[start:start + BUILD_BATCH_SIZE]
+        observations = compute_observations([
+            (latitude, longitude, format_utc(date)) for latitude, longitude, date in chunk
+        ])
+        store.put_many(
+            (latitude, longitude, date, observation)
+            for (latitude, longitude, date), observation in zip(chunk, observations)
+            if not isinstance(observation, Exception)
+        )
+        added += sum(not isinstance(observation, Exception) for observation in observations)
+    return added, pruned
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Precompute bright-object observations for popular locations")
+    parser.add_argument("output", help="SQLite store to create or refresh")
+    parser.add_argument("--location", action="append", type=parse_location, metavar="LAT,LON",
+                        help="Location to precompute (repeatable; default: the web page's quick cities)")
+    parser.add_argument("--days", type=float, default=3.0, help="Days ahead to cover")
+    parser.add_argument("--step-minutes", type=float, default=1.0, help="Minutes between precomputed times")
+    parser.add_argument("--decimals", type=int, default=RESPONSE_CACHE_LATLON_DECIMALS,
+                        help="Decimal places locations are rounded to when matching requests")
+    parser.add_argument("--bucket-seconds", type=float, default=RESPONSE_CACHE_TIME_BUCKET,
+                        help="Width of the time bucket a precomputed time answers for")
+    parser.add_argument("--every", type=float, metavar="HOURS",
+                        help="Keep running and refresh the store every HOURS hours")
+    args = parser.parse_args(argv)
+
+    locations = args.location or [(latitude, longitude) for _, latitude, longitude in QUICK_CITIES]
+    store = PrecomputedStore.create(args.output, args.decimals, args.bucket_seconds)
+    while True:
+        started = time.monotonic()
+        added, pruned = refresh(store, locations, args.days, args.step_minutes)
+        print(f"{datetime.utcnow().isoformat(timespec='seconds')}Z: added {added} observations, "
+              f"pruned {pruned}, in {time.monotonic() - started:.1f}s")
+        if not args.every:
+            return 0
+        time.sleep(args.every * 3600.0)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Offline converter that builds a binary star catalog from a CSV file.
+
+The output is read by the API when STAR_CATALOG_PATH points at it, e.g.:
+
+    python -m app.build_star_catalog bsc5.csv stars.bin --max-magnitude 6.5
+    STAR_CATALOG_PATH=stars.bin python main.py
+
+The CSV needs a header row. RA may be sexagesimal hours ("6:45:08.9") or
+decimal hours/degrees (see --ra-unit); Dec may be sexagesimal ("-16:42:58")
+or decimal degrees. Rows with a missing field are skipped.
+"""
+import argparse
+import csv
+import math
+import sys
+
+import ephem
+
+try:
+    from .catalog import StarCatalog
+except ImportError:
+    from catalog import StarCatalog
+
+
+def parse_ra(value: str, unit: str) -> float:
+    """Parse a right ascension into radians"""
+    if ":" in value:
+        return float(ephem.hours(value))
+    if unit == "degrees":
+        return math.radians(float(value))
+    return math.radians(float(value) * 15.0)
+
+
+def parse_dec(value: str) -> float:
+    """Parse a declination into radians"""
+    if ":" in value:
+        return float(ephem.degrees(value))
+    return math.radians(float(value))
+
+
+def read_csv(path: str, args) -> StarCatalog:
+    names, ra, dec, magnitude = [], [], [], []
+    skipped = 0
+    with open(path, newline="", encoding="utf-8") as f:
+        for row in csv.DictReader(f):
+            try:
+                name = row[args.name_col].strip()
+                mag = float(row[args.mag_col])
+                star_ra = parse_ra(row[args.ra_col].strip(), args.ra_unit)
+                star_dec = parse_dec(row[args.dec_col].strip())
+            except (KeyError, TypeError, ValueError):
+                skipped += 1
+                continue
+            if not name or (args.max_magnitude is not None and mag > args.max_magnitude):
+                skipped += 1
+                continue
+            names.append(name[:args.name_width])
+            ra.append(star_ra)
+            dec.append(star_dec)
+            magnitude.append(mag)
+
+    print(f"Read {len(names)} stars from {path} ({skipped} rows skipped)")
+    return StarCatalog.from_arrays(names, ra, dec, magnitude)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build a memory-mappable star catalog from a CSV file")
+    parser.add_argument("input", help="CSV file with a header row")
+    parser.add_argument("output", help="Binary catalog file to write")
+    parser.add_argument("--name-col", default="name", help="Column holding the star name")
+    parser.add_argument("--ra-col", default="ra", help="Column holding the J2000 right ascension")
+    parser.add_argument("--dec-col", default="dec", help="Column holding the J2000 declination")
+    parser.add_argument("--mag-col", default="mag", help="Column holding the visual magnitude")
+    parser.add_argument("--ra-unit", choices=["hours", "degrees"], default="hours",
+                        help="Unit of decimal RA values (sexagesimal values are always hours)")
+    parser.add_argument("--max-magnitude", type=float, default=None, help="Drop stars fainter than this")
+    parser.add_argument("--name-width", type=int, default=24, help="Bytes reserved per star name")
+    args = parser.parse_args(argv)
+
+    catalog = read_csv(args.input, args)
+    if len(catalog) == 0:
+        print("No stars to write", file=sys.stderr)
+        return 1
+    catalog.write(args.output, name_width=args.name_width)
+    print(f"Wrote {len(catalog)} stars to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Offline builder for the timezone lookup grid.
+
+Rasterizes timezone boundary polygons from a GeoJSON FeatureCollection, such
+as the "combined.json" release of timezone-boundary-builder, onto a regular
+lat/lon grid that the API memory-maps at startup:
+
+    python -m app.build_timezone_grid combined.json timezones.grid --resolution 0.1
+    TIMEZONE_GRID_PATH=timezones.grid python main.py
+
+The input may also be the release's .zip, or an http(s) URL of either; the
+deploy builds (Dockerfile, nixpacks.toml) use that to write app/timezones.grid,
+which the API loads when TIMEZONE_GRID_PATH is not set:
+
+    python -m app.build_timezone_grid $TIMEZONE_BOUNDARIES_URL app/timezones.grid --resolution 0.25
+
+A cell gets the zone of the polygon containing its centre. Cells outside
+every polygon are treated as open ocean and resolve to the nautical zone.
+"""
+import argparse
+import io
+import json
+import math
+import sys
+import urllib.request
+import zipfile
+
+import numpy as np
+
+try:
+    from .timezones import TimezoneGrid
+except ImportError:
+    from timezones import TimezoneGrid
+
+
+def polygon_rings(geometry: dict):
+    """Yield each polygon of a Polygon/MultiPolygon geometry as a list of rings"""
+    if geometry["type"] == "Polygon":
+        yield geometry["coordinates"]
+    elif geometry["type"] == "MultiPolygon":
+        yield from geometry["coordinates"]
+
+
+def rasterize_polygon(grid: np.ndarray, rings, zone_id: int, resolution: float) -> None:
+    """
+    Scanline fill of one polygon (outer ring plus holes, even-odd rule):
+    for each grid row, intersect the row's centre line with every edge and
+    fill the cells whose centres lie between successive crossings.
+    """
+    edges = []
+    for ring in rings:
+        points = np.asarray(ring, dtype=np.float64)[:, :2]
+        edges.append(np.hstack((points[:-1], points[1:])))
+    x0, y0, x1, y1 = np.vstack(edges).T
+
+    rows, cols = grid.shape
+    first_row = max(0, int(math.floor((y0.min() + 90.0) / resolution)))
+    last_row = min(rows - 1, int(math.floor((y0.max() + 90.0) / resolution)))
+    for row in range(first_row, last_row + 1):
+        y = -90.0 + (row + 0.5) * resolution
+        crossing = (y0 <= y) != (y1 <= y)
+        if not crossing.any():
+            continue
+        xs = x0[crossing] + (y - y0[crossing]) * (x1[crossing] - x0[crossing]) / (y1[crossing] - y0[crossing])
+        xs.sort()
+        for start, stop in zip(xs[0::2], xs[1::2]):
+            first_col = max(0, int(math.ceil((start + 180.0) / resolution - 0.5)))
+            last_col = min(cols - 1, int(math.floor((stop + 180.0) / resolution - 0.5)))
+            if last_col >= first_col:
+                grid[row, first_col:last_col + 1] = zone_id
+
+
+def read_features(source: str):
+    """Features of a GeoJSON file, or of the .json inside a .zip, read from a path or an http(s) URL"""
+    if source.startswith(("http://", "https://")):
+        with urllib.request.urlopen(source) as response:
+            data = response.read()
+    else:
+        with open(source, "rb") as f:
+            data = f.read()
+    if zipfile.is_zipfile(io.BytesIO(data)):
+        with zipfile.ZipFile(io.BytesIO(data)) as archive:
+            member = next(name for name in archive.namelist() if name.endswith(".json"))
+            data = archive.read(member)
+    return json.loads(data)["features"]
+
+
+def build_grid(features, resolution: float, property_name: str) -> TimezoneGrid:
+    rows, cols = int(round(180 / resolution)), int(round(360 / resolution))
+    grid = np.zeros((rows, cols), dtype=np.uint16)
+    zones = []
+    zone_ids = {}
+    for feature in features:
+        name = feature["properties"][property_name]
+        if name not in zone_ids:
+            zones.append(name)
+            zone_ids[name] = len(zones)
+        for rings in polygon_rings(feature["geometry"]):
+            rasterize_polygon(grid, rings, zone_ids[name], resolution)
+    return TimezoneGrid(zones, grid, resolution)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Build the offline timezone lookup grid from GeoJSON boundaries")
+    parser.add_argument("input", help="GeoJSON FeatureCollection of timezone polygons (file, .zip or http(s) URL)")
+    parser.add_argument("output", help="Grid file to write")
+    parser.add_argument("--resolution", type=float, default=0.1, help="Cell size in degrees")
+    parser.add_argument("--property", default="tzid", help="Feature property holding the zone name")
+    args = parser.parse_args(argv)
+
+    if (180 / args.resolution) % 1 or (360 / args.resolution) % 1:
+        print("--resolution must divide 180 evenly", file=sys.stderr)
+        return 1
+
+    features = read_features(args.input)
+    grid = build_grid(features, args.resolution, args.property)
+    if len(grid.zones) >= 2 ** 16:
+        print("Too many zones for a uint16 grid", file=sys.stderr)
+        return 1
+    grid.write(args.output)
+    print(f"Wrote {len(grid.zones)} zones on a {grid.rows}x{grid.cols} grid to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
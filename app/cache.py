@@ -0,0 +1,124 @@
+import asyncio
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+import ephem
+
+
+class TTLCache:
+    """
+    Bounded in-process cache: entries expire after a TTL and, once the cache
+    is full, the least recently used entry is evicted. A max_entries of 0
+    disables caching entirely.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 60.0):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if it is missing or expired"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.monotonic():
+                    self._entries.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        if not self.enabled:
+            return
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._entries[key] = (value, time.monotonic() + ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent computations of the same key: the first caller
+    starts the computation and every caller arriving while it is in flight
+    awaits that same result (or exception) instead of starting its own. The
+    computation runs as its own task, so a caller that disconnects does not
+    cancel it for the others. Used from the event loop only.
+    """
+
+    def __init__(self):
+        self.started = 0
+        self.merged = 0
+        self._tasks: Dict[Hashable, asyncio.Task] = {}
+
+    async def run(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Any:
+        """Await compute() for key, or the in-flight computation of key if there is one"""
+        task = self._tasks.get(key)
+        if task is None:
+            self.started += 1
+            task = asyncio.ensure_future(compute())
+            self._tasks[key] = task
+            task.add_done_callback(lambda done: self._finished(key, done))
+        else:
+            self.merged += 1
+        return await asyncio.shield(task)
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled():
+            # Mark the exception as retrieved even if every caller went away
+            task.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        requests = self.started + self.merged
+        return {
+            "in_flight": len(self._tasks),
+            "computations": self.started,
+            "merged": self.merged,
+            "merged_ratio": round(self.merged / requests, 4) if requests else 0.0,
+        }
+
+
+def quantize_location(latitude: float, longitude: float, decimals: int) -> Tuple[float, float]:
+    """Round a location to the given number of decimal places"""
+    return round(latitude, decimals), round(longitude, decimals)
+
+
+def time_bucket(date: ephem.Date, bucket_seconds: float) -> int:
+    """Index of the time bucket containing the given date"""
+    return math.floor(float(date) * 86400.0 / bucket_seconds)
+
+
+def seconds_left_in_bucket(date: ephem.Date, bucket_seconds: float) -> float:
+    """Seconds from the given date until the end of its time bucket"""
+    elapsed = float(date) * 86400.0
+    return (time_bucket(date, bucket_seconds) + 1) * bucket_seconds - elapsed
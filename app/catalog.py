@@ -0,0 +1,394 @@
+import math
+import os
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+import numpy as np
+import ephem
+
+try:
+    from .astro import J2000_JD, julian_date, precess_from_j2000, equatorial_to_horizontal, refraction
+except ImportError:
+    from astro import J2000_JD, julian_date, precess_from_j2000, equatorial_to_horizontal, refraction
+
+
+# Extended bright stars catalog with more accurate magnitudes
+# Format: (Name, RA_hours:minutes:seconds, Dec_degrees:arcmin:arcsec, magnitude)
+BRIGHT_STARS = [
+    ("Sirius", "6:45:08.9", "-16:42:58", -1.46),
+    ("Canopus", "6:23:57.1", "-52:41:44", -0.72),
+    ("Arcturus", "14:15:39.7", "+19:10:57", -0.04),
+    ("Vega", "18:36:56.3", "+38:47:01", 0.03),
+    ("Capella", "5:16:41.4", "+45:59:53", 0.08),
+    ("Rigel", "5:14:32.3", "-8:12:06", 0.13),
+    ("Procyon", "7:39:18.1", "+5:13:30", 0.38),
+    ("Betelgeuse", "5:55:10.3", "+7:24:26", 0.42),
+    ("Achernar", "1:37:42.8", "-57:14:12", 0.46),
+    ("Hadar", "14:3:49.4", "-60:22:23", 0.61),
+    ("Altair", "19:50:47.0", "+8:52:06", 0.77),
+    ("Aldebaran", "4:35:55.2", "+16:30:33", 0.87),
+    ("Antares", "16:29:24.4", "-26:25:55", 0.96),
+    ("Spica", "13:25:11.6", "-11:9:41", 0.98),
+    ("Pollux", "7:45:18.9", "+28:1:34", 1.14),
+    ("Fomalhaut", "22:57:39.0", "-29:37:20", 1.16),
+    ("Deneb", "20:41:25.9", "+45:16:49", 1.25),
+    ("Mimosa", "12:47:43.3", "-59:41:19", 1.25),
+    ("Regulus", "10:8:22.3", "+11:58:02", 1.36),
+    ("Adhara", "6:58:37.5", "-28:58:19", 1.50),
+    ("Castor", "7:34:36.0", "+31:53:19", 1.58),
+    ("Shaula", "17:33:36.5", "-37:6:14", 1.62),
+    ("Bellatrix", "5:25:7.9", "+6:20:59", 1.64),
+    ("Elnath", "5:26:17.5", "+28:36:27", 1.65),
+    ("Miaplacidus", "9:13:12.2", "-69:43:02", 1.67),
+    ("Alnilam", "5:36:12.8", "-1:12:07", 1.69),
+    ("Alnitak", "5:40:45.6", "-2:27:30", 1.74),
+    ("Alnair", "22:8:13.9", "-46:57:40", 1.74),
+    ("Alioth", "12:54:1.6", "+55:57:35", 1.76),
+    ("Alkaid", "13:47:32.4", "+49:18:48", 1.86),
+    ("Polaris", "2:31:49.0", "+89:15:51", 1.97),
+    ("Kochab", "14:50:42.3", "+74:9:20", 2.07),
+    ("Alrescha", "2:2:2.6", "+2:45:50", 3.62),
+    ("Almach", "2:3:53.9", "+42:19:47", 2.09),
+    ("Gamma Ceti", "2:43:18.0", "+3:14:09", 3.47),
+    ("Epsilon Eridani", "3:32:55.8", "-9:27:30", 3.73),
+]
+
+
+# Binary catalog layout (little-endian): a 16-byte header holding the magic,
+# star count and name width, followed by column blocks of float64 RA (J2000
+# radians), float64 Dec (J2000 radians), float32 magnitude and fixed-width
+# ASCII names. Rows are sorted by magnitude, brightest first.
+CATALOG_MAGIC = b"SKYCAT01"
+CATALOG_HEADER = np.dtype([("magic", "S8"), ("count", "<u4"), ("name_width", "<u4")])
+
+# Number of stars transformed per step when walking the catalog brightest-first
+STAR_CHUNK_SIZE = 256
+
+# Observers whose dates fall within this many days share one precession
+# matrix; precession moves stars by well under an arcsecond per day
+PRECESSION_STEP_DAYS = 1.0
+
+# Width in degrees of the latitude bands of the declination index
+DEC_BAND_DEGREES = 5.0
+
+# Slack in degrees when deciding from J2000 coordinates that a star can never
+# rise (or never set) in a band: refraction lifts stars by up to about half a
+# degree at the horizon, and precession moves declinations by at most 20"/year
+DEC_INDEX_MARGIN = 2.0
+REFRACTION_MARGIN = 1.0
+PRECESSION_DEC_RATE = 20.05 / 3600.0  # degrees/year
+
+# Precession moves stars by at most about 50"/year in any direction, which
+# bounds the error of the hour-angle pre-check done on J2000 coordinates
+PRECESSION_RATE = 50.3 / 3600.0  # degrees/year
+
+# The hour-angle pre-check pays off for a few observers at a time. It is
+# skipped for larger groups, and dropped for the rest of a walk once it lets
+# through more than PRECHECK_MAX_KEPT of a chunk, since then some observer of
+# the group sees nearly every star anyway
+PRECHECK_MAX_OBSERVERS = 16
+PRECHECK_MAX_KEPT = 0.75
+
+
+class StarPositions(NamedTuple):
+    """Horizon and equator-of-date coordinates for a set of catalog rows"""
+    index: np.ndarray  # catalog rows the positions belong to
+    altitude: np.ndarray  # degrees, refracted
+    azimuth: np.ndarray  # degrees from North through East
+    right_ascension: np.ndarray  # radians, equinox of date
+    declination: np.ndarray  # radians, equinox of date
+
+
+class StarCatalog:
+    """
+    Fixed stars held as contiguous arrays of J2000 RA/Dec (radians) and
+    magnitude, sorted brightest first, so that stars can be transformed for
+    an observer in vectorized passes instead of one ephem.FixedBody per star.
+    The arrays may be memory-mapped from a binary catalog file, in which case
+    their pages are shared by every worker process reading the same file.
+    """
+
+    def __init__(self, names: np.ndarray, ra: np.ndarray, dec: np.ndarray, magnitude: np.ndarray):
+        self.names = names
+        self.ra = ra
+        self.dec = dec
+        self.magnitude = magnitude
+        self._rows_by_name = None
+        self._declination_index = None
+
+    def __len__(self) -> int:
+        return len(self.magnitude)
+
+    def name(self, i: int) -> str:
+        return self.names[i].decode("ascii", "replace")
+
+    @classmethod
+    def from_arrays(cls, names: Sequence[str], ra, dec, magnitude) -> "StarCatalog":
+        """Build an in-memory catalog, sorting the rows by magnitude"""
+        magnitude = np.asarray(magnitude, dtype=np.float64)
+        order = np.argsort(magnitude, kind="stable")
+        name_array = np.array([n.encode("ascii", "replace") for n in names], dtype=bytes)
+        return cls(
+            name_array[order],
+            np.ascontiguousarray(np.asarray(ra, dtype=np.float64)[order]),
+            np.ascontiguousarray(np.asarray(dec, dtype=np.float64)[order]),
+            np.ascontiguousarray(magnitude[order]),
+        )
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[Tuple[str, str, str, float]]) -> "StarCatalog":
+        """Build a catalog from (name, RA "h:m:s", Dec "d:m:s", magnitude) tuples"""
+        names = [entry[0] for entry in entries]
+        ra = [float(ephem.hours(entry[1])) for entry in entries]
+        dec = [float(ephem.degrees(entry[2])) for entry in entries]
+        magnitude = [entry[3] for entry in entries]
+        return cls.from_arrays(names, ra, dec, magnitude)
+
+    @classmethod
+    def from_file(cls, path: str) -> "StarCatalog":
+        """Memory-map a binary catalog written by StarCatalog.write()"""
+        header = np.fromfile(path, dtype=CATALOG_HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != CATALOG_MAGIC:
+            raise ValueError(f"{path} is not a star catalog file")
+        count = int(header["count"][0])
+        name_width = int(header["name_width"][0])
+
+        offset = CATALOG_HEADER.itemsize
+        columns = []
+        for dtype in ("<f8", "<f8", "<f4", f"S{name_width}"):
+            columns.append(np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,)))
+            offset += count * np.dtype(dtype).itemsize
+        ra, dec, magnitude, names = columns
+        return cls(names, ra, dec, magnitude)
+
+    def write(self, path: str, name_width: int = 24) -> None:
+        """Write the catalog in the binary format read by from_file()"""
+        header = np.zeros(1, dtype=CATALOG_HEADER)
+        header["magic"] = CATALOG_MAGIC
+        header["count"] = len(self)
+        header["name_width"] = name_width
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(np.asarray(self.ra, dtype="<f8").tobytes())
+            f.write(np.asarray(self.dec, dtype="<f8").tobytes())
+            f.write(np.asarray(self.magnitude, dtype="<f4").tobytes())
+            f.write(np.asarray(self.names, dtype=f"S{name_width}").tobytes())
+
+    def find(self, name: str) -> Optional[int]:
+        """Catalog row of the star with the given name (case-insensitive), if any"""
+        if self._rows_by_name is None:
+            # Build the lookup before publishing it, so that a concurrent
+            # caller never sees it half filled
+            rows_by_name = {}
+            for row in range(len(self)):
+                rows_by_name.setdefault(self.name(row).lower(), row)
+            self._rows_by_name = rows_by_name
+        return self._rows_by_name.get(name.lower())
+
+    @property
+    def declination_index(self) -> "DeclinationIndex":
+        """Declination index of the catalog, built on first use"""
+        if self._declination_index is None:
+            self._declination_index = DeclinationIndex(self)
+        return self._declination_index
+
+    def preload(self) -> None:
+        """
+        Build everything that is otherwise built on first use: the name
+        lookup, the declination index and each of its bands. Called before
+        forking workers, so that they all share one copy.
+        """
+        self.find("")
+        index = self.declination_index
+        for band in range(index.band_count):
+            index.rows(band, band)
+
+    def horizontal(self, observer: ephem.Observer, rows=None) -> StarPositions:
+        """Compute altitude/azimuth for the given catalog rows (default: all) as seen by the observer"""
+        stars = slice(None) if rows is None else np.asarray(rows, dtype=np.intp)
+        alt, az, ra, dec = _StarTransform([observer]).apply(self, stars, [0])
+        return StarPositions(np.arange(len(self))[stars], alt[0], az[0], ra, dec)
+
+    def brightest_visible(self, observer: ephem.Observer, limit: int) -> StarPositions:
+        """
+        Walk the catalog brightest-first and return the positions of the
+        first `limit` stars above the horizon. Because the rows are sorted by
+        magnitude, no star after the last one returned can outshine them, so
+        the walk stops as soon as enough visible stars have been found.
+        """
+        return self.brightest_visible_batch([observer], limit)[0]
+
+    def risable_rows(self, min_latitude: float, max_latitude: float, jd: float) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, always_up) for observers between two latitudes (degrees) at
+        the given Julian Date: the catalog rows, brightest first, of the stars
+        that can rise for any of them, and whether each stays up all day for
+        all of them. Far from J2000, where precession may have carried stars
+        beyond the index margin, every row is returned.
+        """
+        years = abs(jd - J2000_JD) / 365.25
+        if years * PRECESSION_DEC_RATE + REFRACTION_MARGIN > DEC_INDEX_MARGIN:
+            return np.arange(len(self)), np.zeros(len(self), dtype=bool)
+        index = self.declination_index
+        return index.rows(index.band(min_latitude), index.band(max_latitude))
+
+    def brightest_visible_batch(self, observers: Sequence[ephem.Observer], limit: int) -> List[StarPositions]:
+        """
+        brightest_visible() for many observers at once. Observers sharing a
+        precession epoch are transformed together, one (observer x star)
+        array per chunk of the stars that can rise at their latitudes, and
+        each drops out of the walk once it has `limit` visible stars.
+        """
+        index = self.declination_index
+        results = [None] * len(observers)
+        groups = {}
+        for i, observer in enumerate(observers):
+            epoch = round(julian_date(observer.date) / PRECESSION_STEP_DAYS)
+            groups.setdefault(epoch, []).append(i)
+
+        for members in groups.values():
+            transform = _StarTransform([observers[i] for i in members])
+            latitudes = np.degrees(transform.latitude)
+            rows, always_up = self.risable_rows(latitudes.min(), latitudes.max(), transform.jd)
+            years = abs(transform.jd - J2000_JD) / 365.25
+            min_sin_alt = math.sin(math.radians(-(REFRACTION_MARGIN + years * PRECESSION_RATE)))
+
+            found = [[] for _ in members]
+            counts = np.zeros(len(members), dtype=int)
+            active = np.arange(len(members))
+            precheck = len(members) <= PRECHECK_MAX_OBSERVERS
+            for start in range(0, len(rows), STAR_CHUNK_SIZE):
+                chunk = rows[start:start + STAR_CHUNK_SIZE]
+                if precheck and not always_up[start:start + STAR_CHUNK_SIZE].all():
+                    # Hour-angle pre-check on J2000 coordinates: only stars that
+                    # may be up for some active observer get the full transform
+                    candidates = np.flatnonzero(transform.may_be_up(index, chunk, active, min_sin_alt))
+                    precheck = len(candidates) <= PRECHECK_MAX_KEPT * len(chunk)
+                    chunk = chunk[candidates]
+                    if len(chunk) == 0:
+                        continue
+                alt, az, ra, dec = transform.apply(self, chunk, active)
+                for row, member in enumerate(active):
+                    visible = alt[row] > 0
+                    found[member].append(StarPositions(chunk[visible], alt[row][visible], az[row][visible], ra[visible], dec[visible]))
+                    counts[member] += int(visible.sum())
+                active = active[counts[active] < limit]
+                if len(active) == 0:
+                    break
+
+            for member, chunks in zip(members, found):
+                if chunks:
+                    results[member] = StarPositions(*(np.concatenate(columns)[:limit] for columns in zip(*chunks)))
+                else:
+                    empty = np.empty(0)
+                    results[member] = StarPositions(empty.astype(np.intp), empty, empty, empty, empty)
+        return results
+
+
+class DeclinationIndex:
+    """
+    Catalog rows sorted by J2000 declination. A star of declination dec can
+    rise at latitude lat only if |lat - dec| < 90 and never sets if
+    |lat + dec| > 90, so the stars that can rise anywhere in a latitude band
+    form one contiguous slice of the sorted rows. Each band's rows are cut
+    once, on first use, and kept in magnitude order for the brightest-first
+    walk, with a flag marking the circumpolar ones as always up.
+    """
+
+    def __init__(self, catalog: StarCatalog, band_degrees: float = DEC_BAND_DEGREES,
+                 margin_degrees: float = DEC_INDEX_MARGIN):
+        dec = np.asarray(catalog.dec, dtype=np.float64)
+        ra = np.asarray(catalog.ra, dtype=np.float64)
+        self.order = np.argsort(dec, kind="stable")
+        self.dec_degrees = np.degrees(dec)
+        self.sorted_dec = self.dec_degrees[self.order]
+        self.band_degrees = band_degrees
+        self.margin_degrees = margin_degrees
+        self.band_count = int(math.ceil(180.0 / band_degrees))
+        # J2000 terms of the hour-angle pre-check
+        self.ra = ra
+        self.sin_dec = np.sin(dec)
+        self.cos_dec = np.cos(dec)
+        self._bands: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def band(self, latitude: float) -> int:
+        """Band number of a latitude in degrees"""
+        return min(int((latitude + 90.0) // self.band_degrees), self.band_count - 1)
+
+    def rows(self, first_band: int, last_band: int) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        (rows, always_up) for the latitudes from first_band to last_band:
+        the catalog rows of every star that can rise somewhere in them,
+        brightest first, and whether each one stays above the horizon all day
+        everywhere in them. Single bands are cached; wider spans only come up
+        for batches of observers and are cut afresh.
+        """
+        if first_band == last_band and first_band in self._bands:
+            return self._bands[first_band]
+
+        low = -90.0 + first_band * self.band_degrees
+        high = min(90.0, -90.0 + (last_band + 1) * self.band_degrees)
+        reach = 90.0 + self.margin_degrees
+        first = np.searchsorted(self.sorted_dec, low - reach, side="right")
+        last = np.searchsorted(self.sorted_dec, high + reach, side="left")
+        # Scatter the slice into a mask rather than sorting it: catalog rows
+        # are in magnitude order, so the mask's set positions are brightest first
+        risable = np.zeros(len(self.order), dtype=bool)
+        risable[self.order[first:last]] = True
+        rows = np.flatnonzero(risable)
+        dec = self.dec_degrees[rows]
+        always_up = (dec > reach - low) | (dec < -(high + reach))
+        if first_band == last_band:
+            self._bands[first_band] = (rows, always_up)
+        return rows, always_up
+
+
+class _StarTransform:
+    """
+    Quantities shared by every chunk of a catalog walk for a group of
+    observers. Precession is evaluated once, at the first observer's date.
+    """
+
+    def __init__(self, observers: Sequence[ephem.Observer]):
+        self.jd = julian_date(observers[0].date)
+        self.sidereal_time = np.array([float(o.sidereal_time()) for o in observers])[:, None]
+        self.latitude = np.array([float(o.lat) for o in observers])[:, None]
+        self.pressure = np.array([o.pressure for o in observers])[:, None]
+        self.temperature = np.array([o.temp for o in observers])[:, None]
+
+    def may_be_up(self, index: DeclinationIndex, stars: np.ndarray, rows, min_sin_alt: float) -> np.ndarray:
+        """
+        Mask of the catalog rows `stars` whose J2000 altitude is above
+        asin(min_sin_alt) for at least one of the observers selected by `rows`
+        """
+        sin_lat, cos_lat = np.sin(self.latitude[rows]), np.cos(self.latitude[rows])
+        cos_ha = np.cos(self.sidereal_time[rows] - index.ra[stars])
+        sin_alt = sin_lat * index.sin_dec[stars] + cos_lat * index.cos_dec[stars] * cos_ha
+        return (sin_alt > min_sin_alt).any(axis=0)
+
+    def apply(self, catalog: StarCatalog, stars, rows) -> Tuple[np.ndarray, ...]:
+        """
+        Transform the catalog rows selected by `stars` (a slice or index
+        array) for the observers selected by `rows`.
+        Returns (altitude, azimuth) in degrees with one row per observer,
+        and the equator-of-date (ra, dec) in radians shared by all of them.
+        """
+        ra, dec = precess_from_j2000(catalog.ra[stars], catalog.dec[stars], self.jd)
+        alt, az = equatorial_to_horizontal(self.sidereal_time[rows] - ra, dec, self.latitude[rows])
+
+        alt_deg = np.degrees(alt)
+        alt_deg += refraction(alt_deg, self.pressure[rows], self.temperature[rows])
+        return alt_deg, np.degrees(az), ra, dec
+
+
+def load_star_catalog() -> StarCatalog:
+    """
+    Load the star catalog named by the STAR_CATALOG_PATH environment variable,
+    falling back to the built-in list of bright stars.
+    """
+    path = os.getenv("STAR_CATALOG_PATH")
+    if path:
+        return StarCatalog.from_file(path)
+    return StarCatalog.from_entries(BRIGHT_STARS)
+
+
+# Loaded once at import; shared by every request
+STAR_CATALOG = load_star_catalog()
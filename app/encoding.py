@@ -0,0 +1,38 @@
+import json
+from typing import Any
+
+# orjson (pinned in requirements.txt) encodes several times faster than the
+# stdlib; the fallback produces identical output for the plain data the API
+# builds, for environments installed without it
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# msgpack (also pinned) serves the binary responses; without it they are not offered
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def dumps(data: Any) -> bytes:
+    """
+    Encode trusted, server-built data (dicts, lists, str, int, float, bool,
+    None) as compact UTF-8 JSON, without going through Pydantic.
+    """
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+def loads(data: bytes) -> Any:
+    """Decode JSON produced by dumps()"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def packb(data: Any) -> bytes:
+    """Encode trusted, server-built data as MessagePack (requires msgpack)"""
+    return msgpack.packb(data, use_bin_type=True)
@@ -0,0 +1,320 @@
+import math
+import os
+from typing import Any, Dict, NamedTuple, List, Optional, Sequence, Tuple
+import numpy as np
+import ephem
+
+try:
+    from .astro import DUBLIN_JD_OFFSET, equatorial_to_horizontal, refraction
+    from .cache import TTLCache, time_bucket
+    from .fast_ephemeris import geocentric_positions
+except ImportError:
+    from astro import DUBLIN_JD_OFFSET, equatorial_to_horizontal, refraction
+    from cache import TTLCache, time_bucket
+    from fast_ephemeris import geocentric_positions
+
+
+# Solar-system bodies reported by the API: (name, ephem class, object type)
+SOLAR_SYSTEM_BODIES = [
+    # Sun and Moon
+    ("Sun", ephem.Sun, "sun"),
+    ("Moon", ephem.Moon, "moon"),
+
+    # Planets
+    ("Mercury", ephem.Mercury, "planet"),
+    ("Venus", ephem.Venus, "planet"),
+    ("Mars", ephem.Mars, "planet"),
+    ("Jupiter", ephem.Jupiter, "planet"),
+    ("Saturn", ephem.Saturn, "planet"),
+    ("Uranus", ephem.Uranus, "planet"),
+    ("Neptune", ephem.Neptune, "planet"),
+
+    # Jupiter's Galilean moons
+    ("Io", ephem.Io, "moon"),
+    ("Europa", ephem.Europa, "moon"),
+    ("Ganymede", ephem.Ganymede, "moon"),
+    ("Callisto", ephem.Callisto, "moon"),
+]
+
+# Fallback magnitudes for bodies PyEphem does not report one for
+DEFAULT_MAGNITUDES = {"Sun": -26.74}
+GALILEAN_MOON_MAGNITUDE = 5.5  # Galilean moons are typically magnitude 4.6 to 6.0
+
+# Brightest magnitude each body reaches (rounded down from PyEphem's values
+# over 1900-2100), so that a body can be ruled out of a top-N before it is
+# computed. Galilean moons are always reported at GALILEAN_MOON_MAGNITUDE.
+BEST_MAGNITUDES = {
+    "Sun": -26.9, "Moon": -12.9, "Mercury": -2.5, "Venus": -4.9, "Mars": -3.0,
+    "Jupiter": -2.9, "Saturn": -0.6, "Uranus": 5.2, "Neptune": 7.6,
+    "Io": GALILEAN_MOON_MAGNITUDE, "Europa": GALILEAN_MOON_MAGNITUDE,
+    "Ganymede": GALILEAN_MOON_MAGNITUDE, "Callisto": GALILEAN_MOON_MAGNITUDE,
+}
+
+# Moons that never stray more than a fraction of a degree from their planet:
+# when the planet is further than PARENT_HORIZON_MARGIN degrees below the
+# horizon, so are they
+PARENT_BODIES = {"Io": "Jupiter", "Europa": "Jupiter", "Ganymede": "Jupiter", "Callisto": "Jupiter"}
+PARENT_HORIZON_MARGIN = 0.5
+
+AU_KM = 149597870.7
+EARTH_RADIUS_KM = 6378.14
+EARTH_FLATTENING_RATIO = 0.99664719  # polar / equatorial radius
+
+
+class SolarSystemSnapshot(NamedTuple):
+    """Geocentric apparent positions of every solar-system body at one instant"""
+    names: List[str]
+    types: List[str]
+    ra: np.ndarray  # radians, apparent equinox of date
+    dec: np.ndarray  # radians, apparent equinox of date
+    magnitude: np.ndarray
+    distance: np.ndarray  # AU from Earth, NaN where unknown
+
+
+class SolarSystemPositions(NamedTuple):
+    """Topocentric positions of every solar-system body for one observer"""
+    snapshot: SolarSystemSnapshot
+    altitude: np.ndarray  # degrees, refracted
+    azimuth: np.ndarray  # degrees from North through East
+    right_ascension: np.ndarray  # radians, topocentric apparent
+    declination: np.ndarray  # radians, topocentric apparent
+
+
+def make_bodies() -> List[ephem.Body]:
+    """Instantiate one PyEphem body per entry of SOLAR_SYSTEM_BODIES"""
+    return [body_class() for _, body_class, _ in SOLAR_SYSTEM_BODIES]
+
+
+def compute_snapshot(date: ephem.Date, bodies: Optional[List[ephem.Body]] = None,
+                     only: Optional[Sequence[int]] = None) -> SolarSystemSnapshot:
+    """
+    Run PyEphem's full geocentric computation for every solar-system body,
+    or only for the SOLAR_SYSTEM_BODIES indices in `only`; the others are
+    left as NaN and therefore never above the horizon. Callers computing
+    many dates in a row can pass the same make_bodies() list every time
+    instead of instantiating new bodies.
+    """
+    if bodies is None:
+        bodies = make_bodies()
+    count = len(SOLAR_SYSTEM_BODIES)
+    snapshot = SolarSystemSnapshot(
+        [name for name, _, _ in SOLAR_SYSTEM_BODIES],
+        [body_type for _, _, body_type in SOLAR_SYSTEM_BODIES],
+        np.full(count, math.nan), np.full(count, math.nan), np.full(count, math.nan), np.full(count, math.nan),
+    )
+    update_snapshot(snapshot, date, bodies, range(count) if only is None else only)
+    return snapshot
+
+
+def update_snapshot(snapshot: SolarSystemSnapshot, date: ephem.Date, bodies: List[ephem.Body], indices: Sequence[int]) -> None:
+    """Compute the bodies at the given SOLAR_SYSTEM_BODIES indices into an existing snapshot"""
+    for i in indices:
+        name, _, body_type = SOLAR_SYSTEM_BODIES[i]
+        body = bodies[i]
+        body.compute(date)
+        snapshot.ra[i] = float(body.ra)
+        snapshot.dec[i] = float(body.dec)
+        if body_type == "moon" and name != "Moon":
+            snapshot.magnitude[i] = body.mag if hasattr(body, "mag") else GALILEAN_MOON_MAGNITUDE
+        else:
+            snapshot.magnitude[i] = body.mag if hasattr(body, "mag") else DEFAULT_MAGNITUDES.get(name, 0.0)
+            snapshot.distance[i] = body.earth_distance if hasattr(body, "earth_distance") else math.nan
+
+
+def plan_bodies(magnitude_cutoff: float = math.inf) -> List[int]:
+    """
+    SOLAR_SYSTEM_BODIES indices of the bodies that can be at least as bright
+    as `magnitude_cutoff`, ordered by their best possible magnitude, which
+    puts every planet before its moons
+    """
+    names = [name for name, _, _ in SOLAR_SYSTEM_BODIES]
+    order = sorted(range(len(names)), key=lambda i: BEST_MAGNITUDES[names[i]])
+    return [i for i in order if BEST_MAGNITUDES[names[i]] <= magnitude_cutoff]
+
+
+def planned_positions(observer: ephem.Observer, bodies: List[ephem.Body],
+                      magnitude_cutoff: float = math.inf) -> SolarSystemPositions:
+    """
+    Topocentric positions computed with PyEphem for only the bodies that
+    could still make the caller's top-N: bodies that can never be as bright
+    as `magnitude_cutoff` are skipped, and moons are only computed when
+    their planet is not well below the horizon. Skipped bodies are NaN.
+    """
+    planned = plan_bodies(magnitude_cutoff)
+    parents = [i for i in planned if SOLAR_SYSTEM_BODIES[i][0] not in PARENT_BODIES]
+    snapshot = compute_snapshot(observer.date, bodies, parents)
+    positions = topocentric_positions(snapshot, observer)
+
+    index_of = {name: i for i, (name, _, _) in enumerate(SOLAR_SYSTEM_BODIES)}
+    children = [
+        i for i in planned
+        if SOLAR_SYSTEM_BODIES[i][0] in PARENT_BODIES
+        and positions.altitude[index_of[PARENT_BODIES[SOLAR_SYSTEM_BODIES[i][0]]]] > -PARENT_HORIZON_MARGIN
+    ]
+    if children:
+        update_snapshot(snapshot, observer.date, bodies, children)
+        positions = topocentric_positions(snapshot, observer)
+    return positions
+
+
+class PyEphemBackend:
+    """Full-precision positions from PyEphem, computed one instant at a time"""
+
+    name = "precise"
+    batch_size = 1
+
+    def snapshots(self, dates: Sequence[ephem.Date]) -> List[SolarSystemSnapshot]:
+        bodies = make_bodies()
+        return [compute_snapshot(date, bodies) for date in dates]
+
+
+class AnalyticalBackend:
+    """
+    Arcminute-level positions from the pure-NumPy series in fast_ephemeris.
+    A single instant costs more than with PyEphem, but many instants are
+    evaluated in one vectorized pass, so callers should ask for batches.
+    """
+
+    name = "fast"
+
+    def __init__(self, batch_size: int = 64):
+        self.batch_size = batch_size
+
+    def snapshots(self, dates: Sequence[ephem.Date]) -> List[SolarSystemSnapshot]:
+        jd = np.array([float(date) for date in dates]) + DUBLIN_JD_OFFSET
+        positions = geocentric_positions(jd)
+        names = [name for name, _, _ in SOLAR_SYSTEM_BODIES]
+        types = [body_type for _, _, body_type in SOLAR_SYSTEM_BODIES]
+        ra, dec, distance, magnitude = (
+            np.array([positions[name][k] for name in names]) for k in range(4)
+        )
+        # Galilean moons have no magnitude theory, as on the PyEphem path
+        magnitude[np.isnan(magnitude)] = GALILEAN_MOON_MAGNITUDE
+        return [
+            SolarSystemSnapshot(names, types, ra[:, n].copy(), dec[:, n].copy(), magnitude[:, n].copy(), distance[:, n].copy())
+            for n in range(len(jd))
+        ]
+
+
+# Ephemeris engines selectable with the API's `precision` parameter
+EPHEMERIS_BACKENDS = {
+    backend.name: backend
+    for backend in (PyEphemBackend(), AnalyticalBackend(int(os.getenv("FAST_EPHEMERIS_BATCH", "64"))))
+}
+
+
+class EphemerisCache:
+    """
+    LRU cache of solar-system snapshots keyed by a time bucket. Geocentric
+    positions barely move within a bucket, so every request that falls in
+    the same bucket reuses one computation made at the bucket's midpoint
+    and only applies its own topocentric/horizon transform. Backends that
+    vectorize over time fill the next batch_size buckets at once when a
+    miss falls within batch_size buckets of the current time, where
+    "right now" traffic will ask for them next; misses at other times
+    compute only the buckets asked for.
+    """
+
+    def __init__(self, bucket_seconds: float = 60.0, max_entries: int = 128, backend=None):
+        self.bucket_seconds = bucket_seconds
+        self.backend = backend or EPHEMERIS_BACKENDS["precise"]
+        self._cache = TTLCache(max_entries=max_entries, ttl_seconds=math.inf)
+
+    def snapshot(self, date: ephem.Date) -> SolarSystemSnapshot:
+        """Return the cached snapshot for the bucket containing `date`"""
+        return self.snapshots([date])[0]
+
+    def snapshots(self, dates: Sequence[ephem.Date]) -> List[SolarSystemSnapshot]:
+        """Snapshots for the buckets containing each date, computing every missing bucket in one backend call"""
+        buckets = [time_bucket(date, self.bucket_seconds) for date in dates]
+        found = {}
+        for bucket in dict.fromkeys(buckets):
+            snapshot = self._cache.get(bucket)
+            if snapshot is not None:
+                found[bucket] = snapshot
+        missing = [bucket for bucket in dict.fromkeys(buckets) if bucket not in found]
+        if missing:
+            prefetch = max(1, min(self.backend.batch_size, self._cache.max_entries))
+            now = time_bucket(ephem.now(), self.bucket_seconds)
+            to_compute = {}
+            for bucket in missing:
+                near_now = 0 <= bucket - now < prefetch
+                to_compute.update(dict.fromkeys(range(bucket, bucket + prefetch) if near_now else [bucket]))
+            computed = dict(zip(to_compute, self.backend.snapshots([
+                ephem.Date((b + 0.5) * self.bucket_seconds / 86400.0) for b in to_compute
+            ])))
+            # Prefetched buckets first, so the requested ones are the most recently used
+            requested = set(missing)
+            for b in [b for b in computed if b not in found and b not in requested] + missing:
+                self._cache.set(b, computed[b])
+            found.update(computed)
+        return [found[bucket] for bucket in buckets]
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return self._cache.stats()
+
+
+EPHEMERIS_CACHES = {
+    name: EphemerisCache(
+        bucket_seconds=float(os.getenv("EPHEMERIS_BUCKET_SECONDS", "60")),
+        max_entries=int(os.getenv("EPHEMERIS_CACHE_SIZE", "128")),
+        backend=backend,
+    )
+    for name, backend in EPHEMERIS_BACKENDS.items()
+}
+EPHEMERIS_CACHE = EPHEMERIS_CACHES["precise"]
+
+
+def observer_geocentric_terms(observer: ephem.Observer) -> Tuple[float, float]:
+    """Return (rho*sin(phi'), rho*cos(phi')) in Earth radii for the observer"""
+    lat = float(observer.lat)
+    u = math.atan(EARTH_FLATTENING_RATIO * math.tan(lat))
+    height = observer.elevation / (EARTH_RADIUS_KM * 1000.0)
+    return (
+        EARTH_FLATTENING_RATIO * math.sin(u) + height * math.sin(lat),
+        math.cos(u) + height * math.cos(lat),
+    )
+
+
+def topocentric_correction(dec, distance, hour_angle, rho_sin, rho_cos):
+    """
+    Diurnal parallax (Meeus, Astronomical Algorithms ch. 40): the shift in
+    right ascension and the topocentric declination (radians) of bodies at
+    the given geocentric declination, distance (AU, NaN for none) and hour
+    angle. Broadcasts, so one call covers many bodies or many observers.
+    """
+    sin_parallax = np.where(
+        np.isnan(distance), 0.0,
+        EARTH_RADIUS_KM / (np.nan_to_num(distance, nan=1.0) * AU_KM),
+    )
+    cos_dec = np.cos(dec)
+    denominator = cos_dec - rho_cos * sin_parallax * np.cos(hour_angle)
+    delta_ra = np.arctan2(-rho_cos * sin_parallax * np.sin(hour_angle), denominator)
+    dec = np.arctan2((np.sin(dec) - rho_sin * sin_parallax) * np.cos(delta_ra), denominator)
+    return delta_ra, dec
+
+
+def topocentric_positions(snapshot: SolarSystemSnapshot, observer: ephem.Observer) -> SolarSystemPositions:
+    """
+    Apply the per-observer part of the computation to a geocentric snapshot:
+    diurnal parallax (which matters for the Moon), then the horizon transform
+    and refraction.
+    """
+    rho_sin, rho_cos = observer_geocentric_terms(observer)
+    hour_angle = float(observer.sidereal_time()) - snapshot.ra
+
+    delta_ra, dec = topocentric_correction(snapshot.dec, snapshot.distance, hour_angle, rho_sin, rho_cos)
+    ra = np.mod(snapshot.ra + delta_ra, 2 * math.pi)
+
+    alt, az = equatorial_to_horizontal(hour_angle - delta_ra, dec, float(observer.lat))
+    alt_deg = np.degrees(alt)
+    alt_deg += refraction(alt_deg, observer.pressure, observer.temp)
+    return SolarSystemPositions(snapshot, alt_deg, np.degrees(az), ra, dec)
+
+
+def solar_system_positions(observer: ephem.Observer, cache: EphemerisCache = EPHEMERIS_CACHE) -> SolarSystemPositions:
+    """Positions of the Sun, Moon, planets and Galilean moons for the observer"""
+    return topocentric_positions(cache.snapshot(observer.date), observer)
@@ -0,0 +1,350 @@
+"""
+Low-precision analytical ephemeris in pure NumPy.
+
+Every function takes an array of Julian Dates (UT) and evaluates all of
+them in one vectorized pass. Accuracy is at the arcminute level over
+1800-2050, which is ample for ranking and plotting what is up:
+
+- planets and the Sun: Keplerian elements with linear rates (Standish,
+  "Approximate Positions of the Planets", JPL, table 1), with light time
+- Moon: the largest terms of the ELP-2000/82 series (Meeus, Astronomical
+  Algorithms, ch. 47)
+- Galilean moons: Meeus' low-accuracy theory (ch. 44), offset from Jupiter
+- magnitudes: the Astronomical Almanac phase-angle formulas (Meeus ch. 41)
+
+Positions are geocentric, referred to the mean equator and equinox of date;
+nutation and aberration (each under half an arcminute) are neglected.
+"""
+import math
+from typing import Dict, Tuple
+import numpy as np
+
+try:
+    from .astro import J2000_JD, precession_matrix
+except ImportError:
+    from astro import J2000_JD, precession_matrix
+
+
+# Keplerian elements at J2000 and their rates per Julian century, one row per
+# body: a (AU), e, I, L, longitude of perihelion, longitude of node (degrees).
+# The Earth row is the Earth-Moon barycentre.
+PLANETS = ["Mercury", "Venus", "Earth", "Mars", "Jupiter", "Saturn", "Uranus", "Neptune"]
+PLANET_ELEMENTS = np.array([
+    (0.38709927, 0.20563593, 7.00497902, 252.25032350, 77.45779628, 48.33076593),
+    (0.72333566, 0.00677672, 3.39467605, 181.97909950, 131.60246718, 76.67984255),
+    (1.00000261, 0.01671123, -0.00001531, 100.46457166, 102.93768193, 0.0),
+    (1.52371034, 0.09339410, 1.84969142, -4.55343205, -23.94362959, 49.55953891),
+    (5.20288700, 0.04838624, 1.30439695, 34.39644051, 14.72847983, 100.47390909),
+    (9.53667594, 0.05386179, 2.48599187, 49.95424423, 92.59887831, 113.66242448),
+    (19.18916464, 0.04725744, 0.77263783, 313.23810451, 170.95427630, 74.01692503),
+    (30.06992276, 0.00859048, 1.77004347, -55.12002969, 44.96476227, 131.78422574),
+])
+PLANET_RATES = np.array([
+    (0.00000037, 0.00001906, -0.00594749, 149472.67411175, 0.16047689, -0.12534081),
+    (0.00000390, -0.00004107, -0.00078890, 58517.81538729, 0.00268329, -0.27769418),
+    (0.00000562, -0.00004392, -0.01294668, 35999.37244981, 0.32327364, 0.0),
+    (0.00001847, 0.00007882, -0.00813131, 19140.30268499, 0.44441088, -0.29257343),
+    (-0.00011607, -0.00013253, -0.00183714, 3034.74612775, 0.21252668, 0.20469106),
+    (-0.00125060, -0.00050991, 0.00193609, 1222.49362201, -0.41897216, -0.28867794),
+    (-0.00196176, -0.00004397, -0.00242939, 428.48202785, 0.40805281, 0.04240589),
+    (0.00026291, 0.00005105, 0.00035372, 218.45945325, -0.32241464, -0.00508664),
+])
+EARTH, JUPITER, SATURN = PLANETS.index("Earth"), PLANETS.index("Jupiter"), PLANETS.index("Saturn")
+
+# Visual magnitude at unit distances and the phase-angle polynomial
+# coefficients (per degree, degree^2, degree^3); the Earth row is unused
+PLANET_MAGNITUDES = np.array([
+    (-0.42, 0.0380, -0.000273, 0.000002),
+    (-4.40, 0.0009, 0.000239, -0.00000065),
+    (0.0, 0.0, 0.0, 0.0),
+    (-1.52, 0.016, 0.0, 0.0),
+    (-9.40, 0.005, 0.0, 0.0),
+    (-8.88, 0.0, 0.0, 0.0),
+    (-7.19, 0.0, 0.0, 0.0),
+    (-6.87, 0.0, 0.0, 0.0),
+])
+SUN_MAGNITUDE = -26.74  # at 1 AU
+MOON_MAGNITUDE = -12.73  # full Moon at mean distance
+
+OBLIQUITY_J2000 = math.radians(23.4392911)
+LIGHT_DAYS_PER_AU = 0.0057755183
+AU_KM = 149597870.7
+
+# Moon series (Meeus tables 47.A and 47.B): multiples of D, M, M', F and the
+# coefficients of longitude (1e-6 degrees), distance (1e-3 km), latitude (1e-6 degrees)
+MOON_LONGITUDE_DISTANCE = np.array([
+    (0, 0, 1, 0, 6288774, -20905355), (2, 0, -1, 0, 1274027, -3699111),
+    (2, 0, 0, 0, 658314, -2955968), (0, 0, 2, 0, 213618, -569925),
+    (0, 1, 0, 0, -185116, 48888), (0, 0, 0, 2, -114332, -3149),
+    (2, 0, -2, 0, 58793, 246158), (2, -1, -1, 0, 57066, -152138),
+    (2, 0, 1, 0, 53322, -170733), (2, -1, 0, 0, 45758, -204586),
+    (0, 1, -1, 0, -40923, -129620), (1, 0, 0, 0, -34720, 108743),
+    (0, 1, 1, 0, -30383, 104755), (2, 0, 0, -2, 15327, 10321),
+    (0, 0, 1, 2, -12528, 0), (0, 0, 1, -2, 10980, 79661),
+    (4, 0, -1, 0, 10675, -34782), (0, 0, 3, 0, 10034, -23210),
+    (4, 0, -2, 0, 8548, -21636), (2, 1, -1, 0, -7888, 24208),
+    (2, 1, 0, 0, -6766, 30824), (1, 0, -1, 0, -5163, -8379),
+    (1, 1, 0, 0, 4987, -16675), (2, -1, 1, 0, 4036, -12831),
+    (2, 0, 2, 0, 3994, -10445), (4, 0, 0, 0, 3861, -11650),
+    (2, 0, -3, 0, 3665, 14403), (0, 1, -2, 0, -2689, -7003),
+    (2, 0, -1, 2, -2602, 0), (2, -1, -2, 0, 2390, 10056),
+    (1, 0, 1, 0, -2348, 6322), (2, -2, 0, 0, 2236, -9884),
+], dtype=float)
+MOON_LATITUDE = np.array([
+    (0, 0, 0, 1, 5128122), (0, 0, 1, 1, 280602), (0, 0, 1, -1, 277693),
+    (2, 0, 0, -1, 173237), (2, 0, -1, 1, 55413), (2, 0, -1, -1, 46271),
+    (2, 0, 0, 1, 32573), (0, 0, 2, 1, 17198), (2, 0, 1, -1, 9266),
+    (0, 0, 2, -1, 8822), (2, -1, 0, -1, 8216), (2, 0, -2, -1, 4324),
+    (2, 0, 1, 1, 4200), (2, 1, 0, -1, -3359), (2, -1, -1, 1, 2463),
+    (2, -1, 0, 1, 2211), (2, -1, -1, -1, 2065), (0, 1, -1, -1, -1870),
+    (4, 0, -1, -1, 1828), (0, 1, 0, 1, -1794), (0, 0, 0, 3, -1749),
+    (0, 1, -1, 1, -1565), (1, 0, 0, 1, -1491), (0, 1, 1, 1, -1475),
+    (0, 1, 1, -1, -1410), (0, 1, 0, -1, -1344), (1, 0, 0, -1, -1335),
+    (0, 0, 3, 1, 1107), (4, 0, 0, -1, 1021), (4, 0, -1, 1, 833),
+], dtype=float)
+
+# Galilean moons (Meeus ch. 44, low accuracy): mean longitude at the epoch
+# and daily motion (degrees), and mean distance from Jupiter (equatorial radii)
+GALILEAN_MOONS = {
+    "Io": (163.8069, 203.4058646, 5.9057),
+    "Europa": (358.4140, 101.2916335, 9.3966),
+    "Ganymede": (5.7176, 50.2345180, 14.9883),
+    "Callisto": (224.8092, 21.4879800, 26.3627),
+}
+JUPITER_SEMIDIAMETER = math.radians(98.44 / 3600.0)  # equatorial, at 1 AU
+
+
+def delta_t_days(jd: np.ndarray) -> np.ndarray:
+    """TT - UT in days (Espenak and Meeus polynomials, coarse outside 2005-2050)"""
+    year = 2000.0 + (jd - J2000_JD) / 365.25
+    t = year - 2000.0
+    recent = 62.92 + 0.32217 * t + 0.005589 * t ** 2
+    u = (year - 1820.0) / 100.0
+    long_term = -20.0 + 32.0 * u ** 2
+    seconds = np.where((year >= 2005.0) & (year < 2050.0), recent, long_term)
+    return seconds / 86400.0
+
+
+def heliocentric(jd_tt: np.ndarray) -> np.ndarray:
+    """
+    Heliocentric ecliptic J2000 positions (AU) of every PLANETS body, shape
+    (3, bodies, n), for Julian Dates (TT) of shape (n,) or (bodies, n)
+    """
+    t = (np.broadcast_to(jd_tt, (len(PLANETS),) + np.shape(jd_tt)[-1:]) - J2000_JD) / 36525.0
+    a, e, inclination, mean_longitude, perihelion, node = (
+        PLANET_ELEMENTS[:, k, None] + PLANET_RATES[:, k, None] * t for k in range(6)
+    )
+    inclination, node = np.radians(inclination), np.radians(node)
+    argument = np.radians(perihelion) - node
+    mean_anomaly = np.radians(np.mod(mean_longitude - perihelion + 180.0, 360.0) - 180.0)
+
+    eccentric = mean_anomaly + e * np.sin(mean_anomaly)
+    for _ in range(6):
+        eccentric -= (eccentric - e * np.sin(eccentric) - mean_anomaly) / (1.0 - e * np.cos(eccentric))
+    x_orbit = a * (np.cos(eccentric) - e)
+    y_orbit = a * np.sqrt(1.0 - e ** 2) * np.sin(eccentric)
+
+    cos_w, sin_w = np.cos(argument), np.sin(argument)
+    cos_n, sin_n = np.cos(node), np.sin(node)
+    cos_i, sin_i = np.cos(inclination), np.sin(inclination)
+    return np.array([
+        (cos_w * cos_n - sin_w * sin_n * cos_i) * x_orbit + (-sin_w * cos_n - cos_w * sin_n * cos_i) * y_orbit,
+        (cos_w * sin_n + sin_w * cos_n * cos_i) * x_orbit + (-sin_w * sin_n + cos_w * cos_n * cos_i) * y_orbit,
+        sin_w * sin_i * x_orbit + cos_w * sin_i * y_orbit,
+    ])
+
+
+def ecliptic_j2000_to_date(vectors: np.ndarray, jd: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """RA/Dec (radians) of date for ecliptic J2000 vectors of shape (3, ..., n)"""
+    cos_e, sin_e = math.cos(OBLIQUITY_J2000), math.sin(OBLIQUITY_J2000)
+    to_equator = np.array([[1.0, 0.0, 0.0], [0.0, cos_e, -sin_e], [0.0, sin_e, cos_e]])
+    # Precession moves by well under an arcsecond a day, so one matrix serves
+    # a batch spanning a few days; longer batches get one matrix per date
+    if jd[-1] - jd[0] < 5.0 and jd[0] - jd[-1] < 5.0:
+        rotation = precession_matrix(0.5 * (jd[0] + jd[-1])) @ to_equator
+        x, y, z = np.tensordot(rotation, vectors, axes=1)
+    else:
+        rotation = np.array([precession_matrix(d) for d in jd]) @ to_equator
+        x, y, z = np.einsum("nij,j...n->i...n", rotation, vectors)
+    return np.mod(np.arctan2(y, x), 2 * math.pi), np.arctan2(z, np.hypot(x, y))
+
+
+def _norm(vectors: np.ndarray) -> np.ndarray:
+    return np.sqrt((vectors ** 2).sum(axis=0))
+
+
+def _phase_angle(sun_distance: np.ndarray, earth_distance: np.ndarray, earth_sun: np.ndarray) -> np.ndarray:
+    """Sun-body-Earth angle in degrees from the triangle's three sides (AU)"""
+    cos_i = (sun_distance ** 2 + earth_distance ** 2 - earth_sun ** 2) / (2 * sun_distance * earth_distance)
+    return np.degrees(np.arccos(np.clip(cos_i, -1.0, 1.0)))
+
+
+def _saturn_ring_term(geocentric: np.ndarray, jd_tt: np.ndarray) -> np.ndarray:
+    """-2.60 sin|B| + 1.25 sin^2 B for the ring tilt B seen from Earth (Meeus ch. 45)"""
+    t = (jd_tt - J2000_JD) / 36525.0
+    inclination = np.radians(28.075216 - 0.012998 * t)
+    node = np.radians(169.508470 + 1.394681 * t)
+    x, y, z = geocentric
+    longitude = np.arctan2(y, x)
+    latitude = np.arctan2(z, np.hypot(x, y))
+    sin_b = (np.sin(inclination) * np.cos(latitude) * np.sin(longitude - node)
+             - np.cos(inclination) * np.sin(latitude))
+    return -2.60 * np.abs(sin_b) + 1.25 * sin_b ** 2
+
+
+def planets(jd: np.ndarray) -> Dict[str, Tuple[np.ndarray, ...]]:
+    """(ra, dec, distance in AU, magnitude) of the Sun, planets and Galilean moons"""
+    jd_tt = jd + delta_t_days(jd)
+    bodies = heliocentric(jd_tt)
+    earth = bodies[:, EARTH]
+    earth_sun = _norm(earth)
+
+    # Light time: every body is seen where it was when its light left it.
+    # The Earth row stands in for the Sun, seen from the Earth now.
+    distance = _norm(bodies - earth[:, None])
+    distance[EARTH] = earth_sun
+    bodies = heliocentric(jd_tt - distance * LIGHT_DAYS_PER_AU)
+    geocentric = bodies - earth[:, None]
+    geocentric[:, EARTH] = -bodies[:, EARTH]
+    distance = _norm(geocentric)
+    sun_distance = _norm(bodies)
+
+    phase = _phase_angle(sun_distance, distance, earth_sun)
+    absolute, linear, square, cube = PLANET_MAGNITUDES.T[:, :, None]
+    magnitude = absolute + 5 * np.log10(sun_distance * distance) + phase * (linear + phase * (square + phase * cube))
+    magnitude[EARTH] = SUN_MAGNITUDE + 5 * np.log10(earth_sun)
+    magnitude[SATURN] += _saturn_ring_term(geocentric[:, SATURN], jd_tt)
+
+    moons = galilean_moons(bodies[:, JUPITER], earth, jd_tt)
+    ra, dec = ecliptic_j2000_to_date(np.concatenate((geocentric, moons), axis=1), jd)
+
+    results = {}
+    for i, name in enumerate(PLANETS):
+        results["Sun" if i == EARTH else name] = (ra[i], dec[i], distance[i], magnitude[i])
+    missing = np.full_like(jd, math.nan)
+    for i, name in enumerate(GALILEAN_MOONS, start=len(PLANETS)):
+        results[name] = (ra[i], dec[i], missing, missing)
+    return results
+
+
+def galilean_moons(jupiter: np.ndarray, earth: np.ndarray, jd_tt: np.ndarray) -> np.ndarray:
+    """
+    Geocentric ecliptic J2000 directions of Io, Europa, Ganymede and Callisto,
+    shape (3, 4, n), from their apparent offsets from Jupiter (Meeus ch. 44,
+    low accuracy), given the heliocentric positions of Jupiter (light-time
+    corrected) and the Earth. The offsets are applied along the ecliptic,
+    which Jupiter's equator follows to within a few degrees.
+    """
+    geocentric = jupiter - earth
+    distance = _norm(geocentric)
+    sun_distance = _norm(jupiter)
+    earth_sun = _norm(earth)
+    # Signed phase angle: positive when the Earth leads Jupiter in heliocentric longitude
+    psi = _phase_angle(sun_distance, distance, earth_sun)
+    psi *= np.sign(jupiter[0] * earth[1] - jupiter[1] * earth[0])
+
+    d = jd_tt - J2000_JD
+    v = np.radians(172.74 + 0.00111588 * d)
+    n = np.radians(20.020 + 0.0830853 * d + 0.329 * np.sin(v))
+    b = 5.555 * np.sin(n) + 0.168 * np.sin(2 * n)
+    lam = np.radians(34.35 + 0.083091 * d + 0.329 * np.sin(v) + b)
+    ds = 3.12 * np.sin(lam + np.radians(42.8))
+    de = np.radians(ds - 2.22 * np.sin(np.radians(psi)) * np.cos(lam + np.radians(22.0))
+                    - 1.30 * (sun_distance - distance) / distance * np.sin(lam - np.radians(100.5)))
+
+    elapsed = d - distance / 173.0
+    mean = {name: start + rate * elapsed + psi - b for name, (start, rate, _) in GALILEAN_MOONS.items()}
+    g = np.radians(331.18 + 50.310482 * elapsed)
+    h = np.radians(87.45 + 21.569231 * elapsed)
+    u = {
+        "Io": np.radians(mean["Io"] + 0.473 * np.sin(np.radians(2 * (mean["Io"] - mean["Europa"])))),
+        "Europa": np.radians(mean["Europa"] + 1.065 * np.sin(np.radians(2 * (mean["Europa"] - mean["Ganymede"])))),
+        "Ganymede": np.radians(mean["Ganymede"] + 0.165 * np.sin(g)),
+        "Callisto": np.radians(mean["Callisto"] + 0.843 * np.sin(h)),
+    }
+    r = {
+        "Io": GALILEAN_MOONS["Io"][2] - 0.0244 * np.cos(2 * (u["Io"] - u["Europa"])),
+        "Europa": GALILEAN_MOONS["Europa"][2] - 0.0882 * np.cos(2 * (u["Europa"] - u["Ganymede"])),
+        "Ganymede": GALILEAN_MOONS["Ganymede"][2] - 0.0216 * np.cos(g),
+        "Callisto": GALILEAN_MOONS["Callisto"][2] - 0.1939 * np.cos(h),
+    }
+
+    x, y, z = geocentric
+    longitude = np.arctan2(y, x)
+    latitude = np.arcsin(z / distance)
+    semidiameter = JUPITER_SEMIDIAMETER / distance
+    # X grows towards the west (decreasing longitude), Y towards the north
+    u = np.array([u[name] for name in GALILEAN_MOONS])
+    r = np.array([r[name] for name in GALILEAN_MOONS])
+    moon_longitude = longitude - r * np.sin(u) * semidiameter / np.cos(latitude)
+    moon_latitude = latitude - r * np.cos(u) * np.sin(de) * semidiameter
+    return np.array([
+        np.cos(moon_latitude) * np.cos(moon_longitude),
+        np.cos(moon_latitude) * np.sin(moon_longitude),
+        np.sin(moon_latitude),
+    ])
+
+
+def moon(jd: np.ndarray, sun_ra: np.ndarray, sun_dec: np.ndarray) -> Tuple[np.ndarray, ...]:
+    """(ra, dec, distance in AU, magnitude) of the Moon"""
+    jd_tt = jd + delta_t_days(jd)
+    t = (jd_tt - J2000_JD) / 36525.0
+    mean_longitude = 218.3164477 + 481267.88123421 * t - 0.0015786 * t ** 2
+    elongation = 297.8501921 + 445267.1114034 * t - 0.0018819 * t ** 2
+    sun_anomaly = 357.5291092 + 35999.0502909 * t - 0.0001536 * t ** 2
+    moon_anomaly = 134.9633964 + 477198.8675055 * t + 0.0087414 * t ** 2
+    latitude_argument = 93.2720950 + 483202.0175233 * t - 0.0036539 * t ** 2
+    eccentricity = 1.0 - 0.002516 * t - 0.0000074 * t ** 2
+    a1 = np.radians(119.75 + 131.849 * t)
+    a2 = np.radians(53.09 + 479264.290 * t)
+    a3 = np.radians(313.45 + 481266.484 * t)
+
+    arguments = np.radians(np.array([elongation, sun_anomaly, moon_anomaly, latitude_argument]))
+
+    def series(table):
+        angles = table[:, :4] @ arguments
+        # Terms involving the Sun's anomaly shrink with the Earth's orbital eccentricity
+        factor = eccentricity[None, :] ** np.abs(table[:, 1])[:, None]
+        return angles, factor
+
+    angles, factor = series(MOON_LONGITUDE_DISTANCE)
+    sum_l = (MOON_LONGITUDE_DISTANCE[:, 4:5] * factor * np.sin(angles)).sum(axis=0)
+    sum_r = (MOON_LONGITUDE_DISTANCE[:, 5:6] * factor * np.cos(angles)).sum(axis=0)
+    angles, factor = series(MOON_LATITUDE)
+    sum_b = (MOON_LATITUDE[:, 4:5] * factor * np.sin(angles)).sum(axis=0)
+
+    l_rad, f_rad, m_rad = np.radians(mean_longitude), arguments[3], arguments[2]
+    sum_l += 3958 * np.sin(a1) + 1962 * np.sin(l_rad - f_rad) + 318 * np.sin(a2)
+    sum_b += (-2235 * np.sin(l_rad) + 382 * np.sin(a3) + 175 * np.sin(a1 - f_rad)
+              + 175 * np.sin(a1 + f_rad) + 127 * np.sin(l_rad - m_rad) - 115 * np.sin(l_rad + m_rad))
+
+    longitude = np.radians(mean_longitude + sum_l / 1e6)
+    latitude = np.radians(sum_b / 1e6)
+    distance_km = 385000.56 + sum_r / 1000.0
+
+    # Ecliptic of date to equator of date
+    obliquity = np.radians(23.4392911 - 0.0130042 * t)
+    x = np.cos(latitude) * np.cos(longitude)
+    y = np.cos(latitude) * np.sin(longitude)
+    z = np.sin(latitude)
+    ra = np.mod(np.arctan2(np.cos(obliquity) * y - np.sin(obliquity) * z, x), 2 * math.pi)
+    dec = np.arcsin(np.sin(obliquity) * y + np.cos(obliquity) * z)
+
+    # Phase angle from the Sun-Moon elongation (Meeus 48.2-48.3)
+    cos_psi = np.sin(sun_dec) * np.sin(dec) + np.cos(sun_dec) * np.cos(dec) * np.cos(sun_ra - ra)
+    psi = np.arccos(np.clip(cos_psi, -1.0, 1.0))
+    phase = np.degrees(np.arctan2(AU_KM * np.sin(psi), distance_km - AU_KM * np.cos(psi)))
+    magnitude = MOON_MAGNITUDE + 0.026 * np.abs(phase) + 4e-9 * phase ** 4
+    return ra, dec, distance_km / AU_KM, magnitude
+
+
+def geocentric_positions(jd: np.ndarray) -> Dict[str, Tuple[np.ndarray, ...]]:
+    """
+    (ra, dec, distance in AU, magnitude) arrays over the given Julian Dates
+    for the Sun, Moon, planets and Galilean moons, keyed by body name.
+    Galilean moon distances and magnitudes are NaN.
+    """
+    jd = np.atleast_1d(np.asarray(jd, dtype=float))
+    results = planets(jd)
+    results["Moon"] = moon(jd, results["Sun"][0], results["Sun"][1])
+    return results
@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Production entry point: preload and warm up once, then fork workers.
+
+    python main.py                          # what Railway and the Dockerfile run
+    python -m app.launcher --workers 4 --port 8000
+
+The master process imports the app (memory-mapping the star catalog and
+timezone grid), runs warm_up() to build the catalog's search structures and
+exercise every computation path, then binds the listening socket and forks
+WEB_CONCURRENCY uvicorn workers that accept on it. The workers inherit all of
+that copy-on-write instead of each building its own copy, and are ready to
+serve as soon as they start. gc.freeze() keeps the collector in the workers
+from writing to, and so copying, the pages of the preloaded objects.
+
+Anything that must not cross a fork is created lazily in each worker: the
+compute pool's executor, the precomputed store's SQLite connection and the
+live-update tasks. The master restarts workers that die, and SIGTERM/SIGINT
+shut every worker down gracefully.
+"""
+import argparse
+import gc
+import os
+import signal
+import socket
+import sys
+import time
+import traceback
+
+import uvicorn
+
+try:
+    from .main import app, warm_up
+except ImportError:
+    from main import app, warm_up
+
+
+# Seconds to wait before replacing a worker that died, so a worker that
+# crashes on startup does not turn the master into a fork loop
+WORKER_RESTART_DELAY = 1.0
+
+# Connections the kernel queues while every worker is busy (uvicorn's default)
+LISTEN_BACKLOG = 2048
+
+
+def default_workers() -> int:
+    return int(os.getenv("WEB_CONCURRENCY", str(min(4, os.cpu_count() or 1))))
+
+
+def bind_socket(host: str, port: int) -> socket.socket:
+    """Listening socket shared by every worker"""
+    # proto must be IPPROTO_TCP, not 0: asyncio only sets TCP_NODELAY on
+    # accepted sockets that say they are TCP, and without it keep-alive
+    # responses stall on Nagle's algorithm and delayed ACKs (~40 ms each)
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(LISTEN_BACKLOG)
+    sock.set_inheritable(True)
+    return sock
+
+
+def serve(sock: socket.socket, host: str, port: int) -> None:
+    """Run a uvicorn server on the already bound socket until it is told to stop"""
+    config = uvicorn.Config(app, host=host, port=port, access_log=True, log_level="info")
+    uvicorn.Server(config).run(sockets=[sock])
+
+
+def spawn_worker(sock: socket.socket, host: str, port: int) -> int:
+    """Fork a worker serving on `sock`; returns its pid in the master"""
+    pid = os.fork()
+    if pid:
+        return pid
+    # Worker: drop the master's signal handlers (uvicorn installs its own)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    code = 0
+    try:
+        serve(sock, host, port)
+    except BaseException:
+        traceback.print_exc()
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os._exit(code)
+
+
+def run(host: str, port: int, workers: int) -> int:
+    started = time.monotonic()
+    warm_up()
+    print(f"Warm-up finished in {time.monotonic() - started:.2f}s", flush=True)
+
+    sock = bind_socket(host, port)
+    if workers <= 1 or not hasattr(os, "fork"):
+        serve(sock, host, port)
+        return 0
+
+    # Everything allocated so far is long-lived: keep it out of the
+    # collector's reach so that collections in the workers leave it unshared
+    gc.freeze()
+    children = {spawn_worker(sock, host, port) for _ in range(workers)}
+    print(f"Forked {workers} workers on {host}:{port}: {sorted(children)}", flush=True)
+
+    stopping = False
+
+    def stop(signum, frame):
+        nonlocal stopping
+        stopping = True
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+
+    while children:
+        try:
+            pid, status = os.wait()
+        except ChildProcessError:
+            break
+        children.discard(pid)
+        if not stopping:
+            print(f"Worker {pid} exited with status {os.waitstatus_to_exitcode(status)}; restarting", flush=True)
+            time.sleep(WORKER_RESTART_DELAY)
+            if not stopping:
+                children.add(spawn_worker(sock, host, port))
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the API with preloaded, pre-forked workers")
+    parser.add_argument("--host", default=os.getenv("HOST", "0.0.0.0"), help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", "8000")), help="Port to listen on")
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: WEB_CONCURRENCY, else up to 4 by CPU count)")
+    args = parser.parse_args(argv)
+    return run(args.host, args.port, args.workers)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, Set, Tuple
+
+try:
+    from .cache import quantize_location
+except ImportError:
+    from cache import quantize_location
+
+logger = logging.getLogger(__name__)
+
+# compute(latitude, longitude) -> JSON-serializable update for that location
+ComputeFn = Callable[[float, float], Awaitable[Any]]
+
+
+class _Cell:
+    """Subscribers sharing one location cell and update interval"""
+
+    def __init__(self, latitude: float, longitude: float, interval: float):
+        self.latitude = latitude
+        self.longitude = longitude
+        self.interval = interval
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.task: asyncio.Task = None
+        self.latest = None
+
+
+class LiveHub:
+    """
+    Pushes periodic sky updates to subscribers. Subscribers whose locations
+    round to the same cell (and who asked for the same interval) share a
+    single computation per tick, which is fanned out to all of them unless
+    it is identical to the previous one. The per-cell task starts with the
+    first subscriber and stops with the last.
+    """
+
+    def __init__(self, compute: ComputeFn, decimals: int = 2):
+        self.compute = compute
+        self.decimals = decimals
+        self.ticks = 0
+        self.deliveries = 0
+        self.unchanged = 0
+        self._cells: Dict[Hashable, _Cell] = {}
+
+    def cell_key(self, latitude: float, longitude: float, interval: float) -> Tuple:
+        return (*quantize_location(latitude, longitude, self.decimals), interval)
+
+    async def subscribe(self, latitude: float, longitude: float, interval: float) -> AsyncIterator[Dict[str, Any]]:
+        """Yield updates for the location's cell until the caller stops iterating"""
+        key = self.cell_key(latitude, longitude, interval)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = self._cells[key] = _Cell(key[0], key[1], interval)
+            cell.task = asyncio.create_task(self._run(cell))
+
+        # Only the latest update matters, so slow subscribers skip stale ones
+        queue = asyncio.Queue(maxsize=1)
+        if cell.latest is not None:
+            # Late joiners get the cell's latest update right away
+            queue.put_nowait(cell.latest)
+        cell.subscribers.add(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            cell.subscribers.discard(queue)
+            if not cell.subscribers:
+                cell.task.cancel()
+                if self._cells.get(key) is cell:
+                    del self._cells[key]
+
+    async def _run(self, cell: _Cell) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            started = loop.time()
+            try:
+                update = {"event": "update", "data": await self.compute(cell.latitude, cell.longitude)}
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning("Live update failed for cell %s, %s: %s", cell.latitude, cell.longitude, e)
+                update = {"event": "error", "data": {"detail": str(e)}}
+
+            self.ticks += 1
+            if update == cell.latest:
+                # Nothing has changed since the last push, so nothing is sent
+                self.unchanged += 1
+            else:
+                cell.latest = update
+                for queue in list(cell.subscribers):
+                    if queue.full():
+                        queue.get_nowait()
+                    queue.put_nowait(update)
+                    self.deliveries += 1
+            await asyncio.sleep(max(0.0, cell.interval - (loop.time() - started)))
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "cells": len(self._cells),
+            "subscribers": sum(len(cell.subscribers) for cell in self._cells.values()),
+            "ticks": self.ticks,
+            "deliveries": self.deliveries,
+            "unchanged": self.unchanged,
+        }
@@ -0,0 +1,12 @@
+# Quick-city buttons of the web page (main.js): the locations that get the
+# most traffic. Shared by the precomputed store builder and loadtest.py, and
+# kept free of imports so that neither has to load the server to use it.
+QUICK_CITIES = [
+    ("Belfast", 54.5973, -5.9301),
+    ("New York", 40.7128, -74.0060),
+    ("Dublin", 53.3498, -6.2603),
+    ("Tokyo", 35.6762, 139.6503),
+    ("Sydney", -33.8688, 151.2093),
+    ("San Francisco", 37.7749, -122.4194),
+    ("Cape Town", -33.9249, 18.4241),
+]
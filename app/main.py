@@ -1,17 +1,49 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request, Response, Body
 from fastapi.middleware.cors import CORSMiddleware
-from datetime import datetime
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from datetime import datetime, date as Date
+import asyncio
+import ephem
+import hashlib
+import logging
+import math
 import pytz
 import os
-from typing import Optional
+import threading
+from typing import Optional, Dict, Any, List, Literal, Tuple
 
 # Handle both relative imports (when run as package) and absolute imports (when run directly)
 try:
-    from .models import ObservationRequest, ObservationResponse, CelestialObject
-    from .utils import create_observer, get_bright_objects, format_coordinates, get_timezone_from_coordinates
+    from .models import ObservationRequest, ObservationResponse, BatchObservationResult, AlmanacResponse
+    from .utils import SkyObject, create_observer, format_utc, get_bright_objects_batch, get_timezone_from_coordinates, parse_observation_time, iter_sky_track, track_steps
+    from .cache import SingleFlight, TTLCache, quantize_location, time_bucket, seconds_left_in_bucket
+    from .ephemeris import EPHEMERIS_CACHE, EPHEMERIS_CACHES, SOLAR_SYSTEM_BODIES
+    from .catalog import STAR_CATALOG
+    from .workers import PoolOverloaded, create_compute_pool
+    from .live import LiveHub
+    from .almanac import compute_almanac
+    from .timezones import DEFAULT_TIMEZONE_GRID_PATH, TIMEZONE_GRID, get_tzinfo
+    from .metrics import METRICS, MetricsMiddleware
+    from .encoding import dumps, msgpack, packb
+    from .precomputed import PRECOMPUTED_STORE
+    from .visibility import ALTITUDE_SCALE, VISIBILITY_MIN_RESOLUTION, compute_visibility_map, encode_altitudes, run_lengths
 except ImportError:
-    from models import ObservationRequest, ObservationResponse, CelestialObject
-    from utils import create_observer, get_bright_objects, format_coordinates, get_timezone_from_coordinates
+    from models import ObservationRequest, ObservationResponse, BatchObservationResult, AlmanacResponse
+    from utils import SkyObject, create_observer, format_utc, get_bright_objects_batch, get_timezone_from_coordinates, parse_observation_time, iter_sky_track, track_steps
+    from cache import SingleFlight, TTLCache, quantize_location, time_bucket, seconds_left_in_bucket
+    from ephemeris import EPHEMERIS_CACHE, EPHEMERIS_CACHES, SOLAR_SYSTEM_BODIES
+    from catalog import STAR_CATALOG
+    from workers import PoolOverloaded, create_compute_pool
+    from live import LiveHub
+    from almanac import compute_almanac
+    from timezones import DEFAULT_TIMEZONE_GRID_PATH, TIMEZONE_GRID, get_tzinfo
+    from metrics import METRICS, MetricsMiddleware
+    from encoding import dumps, msgpack, packb
+    from precomputed import PRECOMPUTED_STORE
+    from visibility import ALTITUDE_SCALE, VISIBILITY_MIN_RESOLUTION, compute_visibility_map, encode_altitudes, run_lengths
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(
     title="Bright Celestial Objects API",
@@ -41,7 +73,98 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["GET", "POST", "OPTIONS"],
     allow_headers=["*"],
+    expose_headers=["ETag", "Cache-Control", "X-Grid-Rows", "X-Grid-Cols", "X-Grid-Resolution",
+                    "X-Grid-Origin", "X-Altitude-Scale"],
+)
+
+# Per-route request latency histograms, served at /metrics (METRICS_ENABLED=0 disables)
+app.add_middleware(MetricsMiddleware, registry=METRICS)
+
+# Response cache for /api/bright-objects, keyed on location rounded to
+# RESPONSE_CACHE_LATLON_DECIMALS places plus a RESPONSE_CACHE_TIME_BUCKET
+# second time bucket. RESPONSE_CACHE_SIZE=0 disables it.
+RESPONSE_CACHE = TTLCache(
+    max_entries=int(os.getenv("RESPONSE_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("RESPONSE_CACHE_TTL", "60")),
 )
+RESPONSE_CACHE_LATLON_DECIMALS = int(os.getenv("RESPONSE_CACHE_LATLON_DECIMALS", "2"))
+RESPONSE_CACHE_TIME_BUCKET = float(os.getenv("RESPONSE_CACHE_TIME_BUCKET", "60"))
+
+# Concurrent cache misses for the same response cache key share one computation
+RESPONSE_COALESCING = SingleFlight()
+
+# Observation responses are built from plain records and encoded directly;
+# RESPONSE_VALIDATION=1 runs them through the Pydantic models first (debugging)
+RESPONSE_VALIDATION = os.getenv("RESPONSE_VALIDATION", "0") == "1"
+
+# Response formats of /api/bright-objects. "columns" and "msgpack" carry the
+# objects as parallel arrays of raw numbers (no display strings) for
+# renderers that only plot them; msgpack is offered when it is installed.
+COLUMNS_MEDIA_TYPE = "application/vnd.sky-objects.columns+json"
+MSGPACK_MEDIA_TYPE = "application/x-msgpack"
+RESPONSE_MEDIA_TYPES = {"json": "application/json", "columns": COLUMNS_MEDIA_TYPE, "msgpack": MSGPACK_MEDIA_TYPE}
+ACCEPT_FORMATS = {
+    "application/json": "json",
+    COLUMNS_MEDIA_TYPE: "columns",
+    MSGPACK_MEDIA_TYPE: "msgpack",
+    "application/msgpack": "msgpack",
+    "application/vnd.msgpack": "msgpack",
+}
+
+PRECISION_DESCRIPTION = "Ephemeris engine: precise (PyEphem) or fast (arcminute-level analytical series)"
+
+# Largest number of observations accepted by /api/bright-objects/batch
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "500"))
+
+# Largest number of time steps a single /api/sky-track request may stream
+TRACK_MAX_STEPS = int(os.getenv("TRACK_MAX_STEPS", "2000"))
+
+# Live updates: subscribers are grouped into cells of LIVE_LATLON_DECIMALS places
+LIVE_LATLON_DECIMALS = int(os.getenv("LIVE_LATLON_DECIMALS", "2"))
+LIVE_MIN_INTERVAL = int(os.getenv("LIVE_MIN_INTERVAL", "10"))
+LIVE_DEFAULT_INTERVAL = max(LIVE_MIN_INTERVAL, 30)
+
+# Almanac event tables are computed once per UTC day and location cell of
+# ALMANAC_LATLON_DECIMALS places, for up to ALMANAC_MAX_STARS stars
+ALMANAC_CACHE = TTLCache(
+    max_entries=int(os.getenv("ALMANAC_CACHE_SIZE", "1024")),
+    ttl_seconds=float(os.getenv("ALMANAC_CACHE_TTL", str(2 * 86400))),
+)
+ALMANAC_LATLON_DECIMALS = int(os.getenv("ALMANAC_LATLON_DECIMALS", "1"))
+ALMANAC_MAX_STARS = int(os.getenv("ALMANAC_MAX_STARS", "200"))
+
+# Ephemeris computations run here rather than on the event loop
+COMPUTE_POOL = create_compute_pool()
+
+# Locations warm_up() computes, spread over both hemispheres and the poles
+WARM_UP_LOCATIONS = [(51.5, -0.13), (40.71, -74.01), (-33.87, 151.21), (0.0, 0.0), (78.2, 15.6)]
+
+# Set once warm_up() has run; /health reports 503 until then
+WARMED_UP = threading.Event()
+
+
+@app.on_event("startup")
+async def start_warm_up():
+    # The production launcher warms up in the master before forking workers;
+    # a plain `uvicorn app.main:app` warms up in the background instead
+    if not WARMED_UP.is_set():
+        future = asyncio.get_running_loop().run_in_executor(None, warm_up)
+        future.add_done_callback(log_warm_up_failure)
+
+
+def log_warm_up_failure(future: asyncio.Future) -> None:
+    # /health stays 503 if warm-up fails, so say why
+    if not future.cancelled() and future.exception() is not None:
+        logger.error("Warm-up failed; /health will keep reporting 503", exc_info=future.exception())
+
+
+@app.on_event("shutdown")
+async def shutdown_compute_pool():
+    COMPUTE_POOL.shutdown()
+
+
+def overloaded_error(error: PoolOverloaded) -> HTTPException:
+    return HTTPException(status_code=503, detail=str(error), headers={"Retry-After": str(error.retry_after)})
 
 
 @app.get("/")
@@ -52,6 +175,12 @@ async def root():
         "version": "1.0.0",
         "endpoints": {
             "GET /api/bright-objects": "Get brightest celestial objects at a location",
+            "POST /api/bright-objects/batch": "Get brightest celestial objects for many locations/times",
+            "GET /api/sky-track": "Stream object positions over a time range as NDJSON",
+            "GET /api/live": "Subscribe to live sky updates (Server-Sent Events)",
+            "GET /api/almanac": "Rise/transit/set times for a day at a location",
+            "GET /api/visibility-map": "Where on Earth an object is above the horizon (global altitude grid)",
+            "GET /metrics": "Latency histograms and cache/pool gauges (Prometheus format)",
             "GET /docs": "API documentation",
             "GET /redoc": "Alternative documentation"
         }
@@ -60,15 +189,21 @@ async def root():
 
 @app.get("/health")
 async def health_check():
-    """Health check endpoint for Railway"""
+    """Health check endpoint for Railway: 503 until the process has warmed up"""
+    if not WARMED_UP.is_set():
+        return JSONResponse(status_code=503, content={"status": "starting", "service": "sky-objects-api"})
     return {"status": "healthy", "service": "sky-objects-api"}
 
 
 @app.get("/api/bright-objects", response_model=ObservationResponse)
 async def get_bright_objects_endpoint(
+    request: Request,
     latitude: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
     longitude: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
-    time: Optional[str] = Query(None, description="Time in ISO format (YYYY-MM-DDTHH:MM:SS)")
+    time: Optional[str] = Query(None, description="Time in ISO format (YYYY-MM-DDTHH:MM:SS)"),
+    precision: Literal["precise", "fast"] = Query("precise", description=PRECISION_DESCRIPTION),
+    format: Optional[Literal["json", "columns", "msgpack"]] = Query(
+        None, description="Response format; overrides the Accept header (json, columns or msgpack)")
 ):
     """
     Get the 20 brightest celestial objects above the horizon at a given location and time.
@@ -76,64 +211,610 @@ async def get_bright_objects_endpoint(
     - **latitude**: Latitude in decimal degrees (-90 to 90)
     - **longitude**: Longitude in decimal degrees (-180 to 180)
     - **time**: Optional time in ISO format. If not provided, uses current time at location.
+    - **precision**: `precise` (PyEphem, default) or `fast` (arcminute-level analytical series)
+    - **format**: `json` (default), `columns` or `msgpack`; also negotiated
+      from `Accept` (`application/vnd.sky-objects.columns+json`, `application/x-msgpack`)
     
-    Returns a list of celestial objects with their properties.
+    Returns a list of celestial objects with their properties. The columnar
+    formats return them as parallel arrays of numbers instead.
     """
+    response_format = format or negotiate_format(request.headers.get("accept", ""))
+    if response_format == "msgpack" and msgpack is None:
+        raise HTTPException(status_code=406, detail="msgpack responses are not available on this server")
+    
     try:
-        # Create observer
-        observer = create_observer(latitude, longitude, time)
+        date = parse_observation_time(time)
+        observation = await observe(latitude, longitude, time, date, precision)
         
-        # Get current time in location's timezone
+        with METRICS.stage("serialization"):
+            body = encode_observation(latitude, longitude, observation, response_format)
+    
+    except PoolOverloaded as e:
+        raise overloaded_error(e)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    
+    # Results for an explicit time never change; "now" results go stale when the time bucket ends
+    max_age = RESPONSE_CACHE.ttl_seconds
+    if not time:
+        max_age = min(max_age, seconds_left_in_bucket(date, RESPONSE_CACHE_TIME_BUCKET))
+    # The ETag hashes the encoded body, so each format gets its own
+    headers = {
+        "ETag": '"' + hashlib.sha256(body).hexdigest()[:32] + '"',
+        "Cache-Control": f"public, max-age={int(max_age)}",
+        "Vary": "Accept",
+    }
+    if_none_match = request.headers.get("if-none-match", "")
+    if headers["ETag"] in [tag.strip() for tag in if_none_match.split(",")]:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type=RESPONSE_MEDIA_TYPES[response_format], headers=headers)
+
+
+def negotiate_format(accept: str) -> str:
+    """Response format for an Accept header: the supported media type with the highest q, else JSON"""
+    best_format, best_q = "json", 0.0
+    for media_range in accept.split(","):
+        media_type, *params = [part.strip() for part in media_range.split(";")]
+        response_format = ACCEPT_FORMATS.get(media_type.lower())
+        if response_format is None or (response_format == "msgpack" and msgpack is None):
+            continue
+        q = 1.0
+        for param in params:
+            if param.startswith("q="):
+                try:
+                    q = float(param[2:])
+                except ValueError:
+                    q = 0.0
+        if q > best_q:
+            best_format, best_q = response_format, q
+    return best_format
+
+
+@app.post(
+    "/api/bright-objects/batch",
+    response_model=List[BatchObservationResult],
+    # Items are validated one by one in the endpoint so that a bad item is
+    # reported in its result; the documented schema is still ObservationRequest
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {
+        "type": "array",
+        "items": ObservationRequest.model_json_schema(),
+        "maxItems": BATCH_MAX_ITEMS,
+        "title": "Observations",
+        "description": "List of ObservationRequest objects",
+    }}}}},
+)
+async def get_bright_objects_batch_endpoint(
+    observations: List[Any] = Body(..., description="List of ObservationRequest objects"),
+    precision: Literal["precise", "fast"] = Query("precise", description=PRECISION_DESCRIPTION)
+):
+    """
+    Get the brightest celestial objects for many locations/times in one request.
+    
+    The body is a list of observation requests (`latitude`, `longitude` and an
+    optional `time`). Results come back in the same order; an item that fails
+    validation or computation carries an `error` instead of a `result` without
+    failing the rest of the batch. `precision` applies to every item.
+    """
+    if len(observations) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"A batch may contain at most {BATCH_MAX_ITEMS} observations")
+    
+    results = [{"index": i, "result": None, "error": None} for i in range(len(observations))]
+    requests = {}  # result index -> (request, cache key)
+    for i, item in enumerate(observations):
+        try:
+            request = ObservationRequest.model_validate(item)
+            date = parse_observation_time(request.time)
+            requests[i] = (request, response_cache_key(request.latitude, request.longitude, date, precision))
+        except ValidationError as e:
+            results[i]["error"] = "; ".join(
+                ": ".join(filter(None, [".".join(str(part) for part in err["loc"]), err["msg"]]))
+                for err in e.errors()
+            )
+        except ValueError as e:
+            results[i]["error"] = str(e)
+    
+    # Serve what we can from the response cache and compute the rest together
+    observations_by_index = {}
+    missing = []
+    for i, (request, cache_key) in requests.items():
+        observation = RESPONSE_CACHE.get(cache_key)
+        if observation is None:
+            missing.append(i)
+        else:
+            observations_by_index[i] = observation
+    
+    if missing:
+        try:
+            computed = await COMPUTE_POOL.run(
+                compute_observations,
+                [(requests[i][0].latitude, requests[i][0].longitude, requests[i][0].time) for i in missing],
+                precision,
+            )
+        except PoolOverloaded as e:
+            raise overloaded_error(e)
+        for i, observation in zip(missing, computed):
+            if isinstance(observation, Exception):
+                results[i]["error"] = str(observation)
+            else:
+                RESPONSE_CACHE.set(requests[i][1], observation)
+                observations_by_index[i] = observation
+    
+    for i, observation in observations_by_index.items():
+        request = requests[i][0]
+        results[i]["result"] = observation_response(request.latitude, request.longitude, observation)
+    return Response(content=encode_response(results, List[BatchObservationResult]), media_type="application/json")
+
+
+@app.get("/api/sky-track")
+async def sky_track_endpoint(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
+    start: str = Query(..., description="Start time in ISO format (YYYY-MM-DDTHH:MM:SS)"),
+    end: str = Query(..., description="End time in ISO format (YYYY-MM-DDTHH:MM:SS)"),
+    step_minutes: float = Query(5, gt=0, description="Minutes between samples"),
+    objects: Optional[str] = Query(None, description="Comma-separated object names to track, e.g. Venus,Sirius"),
+    max_objects: int = Query(20, ge=1, le=100, description="Brightest objects per sample when no names are given"),
+    precision: Literal["precise", "fast"] = Query("precise", description=PRECISION_DESCRIPTION)
+):
+    """
+    Stream object positions over a time range as NDJSON, one line per time step.
+    
+    Each line is `{"time": ..., "objects": [...]}` with name, type, magnitude,
+    altitude, azimuth and visibility. With `objects`, the named objects are
+    reported at every step whether they are above the horizon or not; otherwise
+    each step lists the brightest objects above the horizon.
+    """
+    try:
+        start_date = parse_observation_time(start)
+        end_date = parse_observation_time(end)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if end_date < start_date:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    
+    step_seconds = step_minutes * 60.0
+    steps = track_steps(start_date, end_date, step_seconds)
+    if steps > TRACK_MAX_STEPS:
+        raise HTTPException(status_code=400, detail=f"Time range needs {steps} steps; at most {TRACK_MAX_STEPS} are allowed")
+    
+    names = None
+    if objects:
+        names = [name.strip() for name in objects.split(",") if name.strip()]
+        solar_names = {name.lower() for name, _, _ in SOLAR_SYSTEM_BODIES}
+        unknown = [name for name in names if name.lower() not in solar_names and STAR_CATALOG.find(name) is None]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown objects: {', '.join(unknown)}")
+    
+    # Each step is computed on the compute pool and sent as soon as it is
+    # ready. The track holds a pool slot until it ends, and the first step is
+    # taken here so that a full pool is refused with a 503 before streaming
+    records = COMPUTE_POOL.stream(
+        iter_sky_track(latitude, longitude, start_date, end_date, step_seconds, names, max_objects, precision)
+    )
+    try:
+        first = await records.__anext__()
+    except PoolOverloaded as e:
+        raise overloaded_error(e)
+    
+    async def lines():
+        yield dumps(first) + b"\n"
+        async for record in records:
+            yield dumps(record) + b"\n"
+    
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+
+@app.get("/api/live")
+async def live_updates_endpoint(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
+    interval_seconds: int = Query(LIVE_DEFAULT_INTERVAL, ge=LIVE_MIN_INTERVAL, le=3600, description="Seconds between updates")
+):
+    """
+    Subscribe to live sky updates as Server-Sent Events.
+    
+    The server pushes an `update` event with the current bright objects (same
+    shape as `/api/bright-objects`) every `interval_seconds`. Clients whose
+    locations round to the same cell share one computation per tick, so the
+    reported location is the cell's rounded coordinates.
+    """
+    async def events():
+        async for update in LIVE_HUB.subscribe(latitude, longitude, interval_seconds):
+            yield f"event: {update['event']}\ndata: {dumps(update['data']).decode()}\n\n"
+    
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/almanac", response_model=AlmanacResponse)
+async def almanac_endpoint(
+    latitude: float = Query(..., ge=-90, le=90, description="Latitude in decimal degrees"),
+    longitude: float = Query(..., ge=-180, le=180, description="Longitude in decimal degrees"),
+    date: Optional[Date] = Query(None, description="UTC day (YYYY-MM-DD). Defaults to today"),
+    max_stars: int = Query(20, ge=0, le=ALMANAC_MAX_STARS, description="Number of brightest stars to include")
+):
+    """
+    Get rise, transit and set times (UTC) for the Sun, Moon, planets, Galilean
+    moons and the brightest stars on a given day.
+    
+    Tables are computed once per day and location cell and shared by every
+    later request for that cell, so the reported location is the cell's
+    rounded coordinates. Times are null when the event does not happen that
+    day; `always_up`/`never_up` flag circumpolar and never-rising objects.
+    """
+    day = date or datetime.utcnow().date()
+    cell_latitude, cell_longitude = quantize_location(latitude, longitude, ALMANAC_LATLON_DECIMALS)
+    cache_key = (cell_latitude, cell_longitude, day)
+    
+    table = ALMANAC_CACHE.get(cache_key)
+    if table is None:
+        try:
+            table = await COMPUTE_POOL.run(compute_almanac, cell_latitude, cell_longitude, day, ALMANAC_MAX_STARS)
+        except PoolOverloaded as e:
+            raise overloaded_error(e)
+        ALMANAC_CACHE.set(cache_key, table)
+    
+    return {
+        "location": location_info(cell_latitude, cell_longitude),
+        "date": day.isoformat(),
+        "objects": table["solar_system"] + table["stars"][:max_stars]
+    }
+
+
+@app.get("/api/visibility-map")
+async def visibility_map_endpoint(
+    object: str = Query(..., description="Solar-system body or star name, e.g. Moon or Sirius"),
+    time: Optional[str] = Query(None, description="Time in ISO format (YYYY-MM-DDTHH:MM:SS). Defaults to now (UTC)"),
+    resolution: float = Query(1.0, ge=VISIBILITY_MIN_RESOLUTION, le=30, description="Grid spacing in degrees; must divide 180"),
+    min_altitude: float = Query(0.0, ge=-90, le=90, description="Altitude (degrees) above which a cell counts as visible"),
+    format: Literal["rle", "binary"] = Query("rle", description="rle: JSON run-length visibility mask; binary: int16 altitude raster"),
+    precision: Literal["precise", "fast"] = Query("precise", description=PRECISION_DESCRIPTION)
+):
+    """
+    Get where on Earth an object is above the horizon at one instant.
+    
+    The grid has 180/resolution rows of latitude, from the north pole down,
+    by twice as many columns of longitude, from 180°W eastward; values are
+    for the centre of each cell and a sea-level observer.
+    
+    `format=rle` returns JSON with `runs`, the run lengths of the
+    row-major mask `altitude > min_altitude`, alternating not-visible and
+    visible and always starting with not-visible. `format=binary` returns
+    the altitudes themselves as little-endian int16 in tenths of a degree,
+    with the grid shape in `X-Grid-*` headers.
+    """
+    try:
+        date = parse_observation_time(time)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    if abs(round(180.0 / resolution) * resolution - 180.0) > 1e-6:
+        raise HTTPException(status_code=400, detail="resolution must divide 180 degrees evenly")
+    
+    try:
+        grid = await COMPUTE_POOL.run(compute_visibility_map, object, date, resolution, precision)
+    except PoolOverloaded as e:
+        raise overloaded_error(e)
+    if grid is None:
+        raise HTTPException(status_code=400, detail=f"Unknown object: {object}")
+    
+    rows, cols = grid.altitude.shape
+    if format == "binary":
+        return Response(
+            content=encode_altitudes(grid.altitude),
+            media_type="application/octet-stream",
+            headers={
+                "X-Grid-Rows": str(rows),
+                "X-Grid-Cols": str(cols),
+                "X-Grid-Resolution": repr(grid.resolution),
+                "X-Grid-Origin": f"{float(grid.latitudes[0])!r},{float(grid.longitudes[0])!r}",
+                "X-Altitude-Scale": repr(ALTITUDE_SCALE),
+            }
+        )
+    
+    visible = grid.altitude > min_altitude
+    subpoint_latitude, subpoint_longitude = grid.subpoint
+    return Response(content=dumps({
+        "object": grid.name,
+        "type": grid.type,
+        "time_used": format_utc(grid.date),
+        "subpoint": {"latitude": round(subpoint_latitude, 4), "longitude": round(subpoint_longitude, 4)},
+        "resolution": grid.resolution,
+        "rows": rows,
+        "cols": cols,
+        "origin": {"latitude": float(grid.latitudes[0]), "longitude": float(grid.longitudes[0])},
+        "min_altitude": min_altitude,
+        "visible_fraction": round(float(visible.mean()), 6),
+        "runs": run_lengths(visible),
+    }), media_type="application/json")
+
+
+async def observe(latitude: float, longitude: float, time: Optional[str], date,
+                  precision: str = "precise") -> Dict[str, Any]:
+    """Location-independent observation for a request, from the response cache or the compute pool"""
+    cache_key = response_cache_key(latitude, longitude, date, precision)
+    observation = RESPONSE_CACHE.get(cache_key)
+    if observation is None and PRECOMPUTED_STORE is not None and precision == "precise":
+        # Popular locations on the precomputed time grid are read from disk
+        observation = PRECOMPUTED_STORE.get(latitude, longitude, date)
+        if observation is not None:
+            RESPONSE_CACHE.set(cache_key, observation)
+    if observation is None:
+        async def compute():
+            result = await COMPUTE_POOL.run(compute_observation, latitude, longitude, time, precision)
+            RESPONSE_CACHE.set(cache_key, result)
+            return result
+        
+        # Requests that miss while another one is computing the same key wait for it
+        observation = await RESPONSE_COALESCING.run(cache_key, compute)
+    return observation
+
+
+async def observe_now(latitude: float, longitude: float) -> Dict[str, Any]:
+    """
+    Observation for a live-update cell at the tick's own time, ready to be
+    sent as JSON. Ticks are closer together than the response cache's time
+    bucket, so they are computed directly rather than served from it.
+    """
+    observation = await COMPUTE_POOL.run(compute_observation, latitude, longitude, None)
+    return observation_response(latitude, longitude, observation)
+
+
+LIVE_HUB = LiveHub(observe_now, decimals=LIVE_LATLON_DECIMALS)
+
+
+def response_cache_key(latitude: float, longitude: float, date, precision: str = "precise") -> Tuple:
+    return (
+        *quantize_location(latitude, longitude, RESPONSE_CACHE_LATLON_DECIMALS),
+        time_bucket(date, RESPONSE_CACHE_TIME_BUCKET),
+        precision,
+    )
+
+
+def location_info(latitude: float, longitude: float) -> Dict[str, Any]:
+    return {
+        "latitude": latitude,
+        "longitude": longitude,
+        "coordinates": f"{latitude:.6f}, {longitude:.6f}"
+    }
+
+
+def object_records(objects: List[SkyObject]) -> List[Dict[str, Any]]:
+    """Plain CelestialObject-shaped records, rounded, with RA/Dec formatted for display"""
+    return [
+        {
+            "name": obj.name,
+            "type": obj.type,
+            "magnitude": round(obj.magnitude, 2),
+            "altitude": round(obj.altitude, 2),
+            "azimuth": round(obj.azimuth, 2),
+            "right_ascension": obj.display_right_ascension(),
+            "declination": obj.display_declination(),
+            "is_above_horizon": obj.is_above_horizon,
+            "distance": round(obj.distance, 3) if obj.distance else None
+        }
+        for obj in objects
+    ]
+
+
+def object_columns(objects: List[SkyObject]) -> Dict[str, List[Any]]:
+    """The objects as parallel arrays of numbers, RA/Dec in degrees; no display strings are built"""
+    return {
+        "name": [obj.name for obj in objects],
+        "type": [obj.type for obj in objects],
+        "magnitude": [round(obj.magnitude, 2) for obj in objects],
+        "altitude": [round(obj.altitude, 2) for obj in objects],
+        "azimuth": [round(obj.azimuth, 2) for obj in objects],
+        "right_ascension": [round(math.degrees(obj.right_ascension), 4) for obj in objects],
+        "declination": [round(math.degrees(obj.declination), 4) for obj in objects],
+        "distance": [round(obj.distance, 3) if obj.distance else None for obj in objects],
+    }
+
+
+# Renderings of an observation's raw records, built the first time a format
+# asks for one and kept in the cached observation, so cache hits reuse them
+OBJECT_RENDERINGS = {"records": object_records, "columns": object_columns}
+
+
+def rendered_objects(observation: Dict[str, Any], rendering: str) -> Any:
+    """The observation's objects rendered by OBJECT_RENDERINGS[rendering], built once"""
+    value = observation.get(rendering)
+    if value is None:
+        value = observation[rendering] = OBJECT_RENDERINGS[rendering](observation["objects"])
+    return value
+
+
+def observation_response(latitude: float, longitude: float, observation: Dict[str, Any]) -> Dict[str, Any]:
+    """ObservationResponse-shaped dict: the echoed location plus a cached observation"""
+    return {
+        "location": location_info(latitude, longitude),
+        "time_used": observation["time_used"],
+        "timezone_info": observation["timezone_info"],
+        "objects": rendered_objects(observation, "records"),
+        "total_objects_found": len(observation["objects"]),
+    }
+
+
+def columnar_response(latitude: float, longitude: float, observation: Dict[str, Any]) -> Dict[str, Any]:
+    """Columnar /api/bright-objects body: the objects as parallel arrays of raw values"""
+    return {
+        "location": location_info(latitude, longitude),
+        "time_used": observation["time_used"],
+        "timezone_info": observation["timezone_info"],
+        "total_objects_found": len(observation["objects"]),
+        "columns": rendered_objects(observation, "columns"),
+    }
+
+
+def encode_observation(latitude: float, longitude: float, observation: Dict[str, Any],
+                       response_format: str = "json") -> bytes:
+    """Body of an /api/bright-objects response in the given format"""
+    if response_format == "columns":
+        return dumps(columnar_response(latitude, longitude, observation))
+    if response_format == "msgpack":
+        return packb(columnar_response(latitude, longitude, observation))
+    return encode_response(observation_response(latitude, longitude, observation), ObservationResponse)
+
+
+def encode_response(data: Any, model) -> bytes:
+    """
+    Encode server-built response data. The records are produced by
+    object_records() in the exact shape of the response models, so they
+    are trusted and encoded directly; RESPONSE_VALIDATION=1 validates them
+    against `model` first.
+    """
+    if RESPONSE_VALIDATION:
+        adapter = TypeAdapter(model)
+        return adapter.dump_json(adapter.validate_python(data))
+    return dumps(data)
+
+
+def compute_observation(latitude: float, longitude: float, time: Optional[str],
+                        precision: str = "precise") -> Dict[str, Any]:
+    """
+    Compute the location-independent part of an observation response
+    (everything except the echoed location), as stored in the response cache.
+    """
+    observation = compute_observations([(latitude, longitude, time)], precision)[0]
+    if isinstance(observation, Exception):
+        raise observation
+    return observation
+
+
+def compute_observations(requests: List[Tuple[float, float, Optional[str]]], precision: str = "precise") -> List[Any]:
+    """
+    compute_observation() for many (latitude, longitude, time) requests at
+    once, sharing the vectorized star pass. Items that fail are returned as
+    their exception instead of aborting the whole batch.
+    """
+    results = [None] * len(requests)
+    observers = []
+    for i, (latitude, longitude, time) in enumerate(requests):
+        try:
+            with METRICS.stage("observer"):
+                observers.append((i, create_observer(latitude, longitude, time)))
+        except Exception as e:
+            results[i] = e
+    
+    raw_objects = get_bright_objects_batch([observer for _, observer in observers], max_objects=20, precision=precision)
+    for (i, observer), objects in zip(observers, raw_objects):
+        latitude, longitude, _ = requests[i]
+        try:
+            results[i] = build_observation(latitude, longitude, observer, objects)
+        except Exception as e:
+            results[i] = e
+    return results
+
+
+def build_observation(latitude: float, longitude: float, observer, raw_objects: List[SkyObject]) -> Dict[str, Any]:
+    # Get current time in location's timezone
+    with METRICS.stage("timezone"):
         timezone_str = get_timezone_from_coordinates(latitude, longitude)
         try:
-            tz = pytz.timezone(timezone_str)
-            dt_utc = observer.date.datetime()
+            tz = get_tzinfo(timezone_str)
+            dt_utc = observer.date.datetime().replace(tzinfo=pytz.utc)
             dt_local = dt_utc.astimezone(tz)
             time_used = dt_local.isoformat()
         except:
             # Fallback to UTC
             time_used = observer.date.datetime().isoformat()
             timezone_str = "UTC"
-        
-        # Get bright objects
-        raw_objects = get_bright_objects(observer, max_objects=20)
-        
-        # Format coordinates and create response objects
-        formatted_objects = []
-        for obj in raw_objects:
-            formatted_objects.append(CelestialObject(
-                name=obj["name"],
-                type=obj["type"],
-                magnitude=round(obj["magnitude"], 2),
-                altitude=round(obj["altitude"], 2),
-                azimuth=round(obj["azimuth"], 2),
-                right_ascension=format_coordinates(obj["right_ascension"]),
-                declination=format_coordinates(obj["declination"]),
-                is_above_horizon=obj["is_above_horizon"],
-                distance=round(obj["distance"], 3) if obj["distance"] else None
-            ))
-        
-        response = ObservationResponse(
-            location={
-                "latitude": latitude,
-                "longitude": longitude,
-                "coordinates": f"{latitude:.6f}, {longitude:.6f}"
-            },
-            time_used=time_used,
-            timezone_info=timezone_str,
-            objects=formatted_objects,
-            total_objects_found=len(formatted_objects)
+    
+    # The records stay raw (RA/Dec in radians, nothing rounded or formatted):
+    # each response format renders them as it needs when it is encoded
+    return {
+        "time_used": time_used,
+        "timezone_info": timezone_str,
+        "objects": raw_objects
+    }
+
+
+def warm_up() -> None:
+    """
+    Build everything that is otherwise built on first use and run each
+    computation path once, so that the first real requests do not pay for
+    it: the star catalog's indexes, timezone objects, both ephemeris
+    engines (whose caches then cover the coming minutes), sky tracks,
+    visibility maps, the almanac and response encoding. Sets WARMED_UP when done.
+    """
+    STAR_CATALOG.preload()
+    if TIMEZONE_GRID is not None:
+        for name in TIMEZONE_GRID.zones:
+            get_tzinfo(name)
+    else:
+        logger.warning(
+            "No timezone grid at %s and TIMEZONE_GRID_PATH is not set: local times use "
+            "a longitude-band guess and can be hours off. Build one with app.build_timezone_grid",
+            DEFAULT_TIMEZONE_GRID_PATH,
         )
-        
-        return response
     
-    except ValueError as e:
-        raise HTTPException(status_code=400, detail=str(e))
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
+    now = parse_observation_time(None)
+    latitude, longitude = WARM_UP_LOCATIONS[0]
+    for precision in EPHEMERIS_CACHES:
+        requests = [(lat, lon, None) for lat, lon in WARM_UP_LOCATIONS]
+        for observation in compute_observations(requests, precision):
+            if isinstance(observation, Exception):
+                raise observation
+        for response_format in RESPONSE_MEDIA_TYPES:
+            if response_format != "msgpack" or msgpack is not None:
+                encode_observation(latitude, longitude, observation, response_format)
+        for _ in iter_sky_track(latitude, longitude, now, ephem.Date(now + 1.0 / 24), 1800.0, precision=precision):
+            pass
+        compute_visibility_map("Moon", now, 1.0, precision)
+    compute_almanac(latitude, longitude, now.datetime().date(), ALMANAC_MAX_STARS)
+    WARMED_UP.set()
 
 
-@app.get("/health")
-async def health_check():
-    """Health check endpoint"""
-    return {"status": "healthy", "timestamp": datetime.utcnow().isoformat()}
\ No newline at end of file
+@app.get("/api/cache/stats")
+async def cache_stats():
+    """Hit/miss counters for the response and ephemeris caches, and compute pool load"""
+    return {
+        "response_cache": RESPONSE_CACHE.stats(),
+        "ephemeris_cache": EPHEMERIS_CACHE.stats(),
+        "fast_ephemeris_cache": EPHEMERIS_CACHES["fast"].stats(),
+        "compute_pool": COMPUTE_POOL.stats(),
+        "live_updates": LIVE_HUB.stats(),
+        "almanac_cache": ALMANAC_CACHE.stats(),
+        "coalescing": RESPONSE_COALESCING.stats(),
+        "precomputed_store": PRECOMPUTED_STORE.stats() if PRECOMPUTED_STORE is not None else None
+    }
+
+
+def _cache_samples(field: str):
+    caches = {"response": RESPONSE_CACHE, "ephemeris": EPHEMERIS_CACHE,
+              "fast_ephemeris": EPHEMERIS_CACHES["fast"], "almanac": ALMANAC_CACHE}
+    if PRECOMPUTED_STORE is not None and field != "size":
+        caches["precomputed"] = PRECOMPUTED_STORE
+    return [({"cache": name}, cache.stats()[field]) for name, cache in caches.items()]
+
+
+METRICS.register("sky_cache_hit_ratio", "gauge", "Fraction of cache lookups that hit",
+                 lambda: _cache_samples("hit_ratio"))
+METRICS.register("sky_cache_hits_total", "counter", "Cache lookups that hit", lambda: _cache_samples("hits"))
+METRICS.register("sky_cache_misses_total", "counter", "Cache lookups that missed", lambda: _cache_samples("misses"))
+METRICS.register("sky_cache_entries", "gauge", "Entries currently cached", lambda: _cache_samples("size"))
+METRICS.register("sky_compute_pool_queue_depth", "gauge", "Jobs waiting for a compute worker",
+                 lambda: [({}, COMPUTE_POOL.queue_depth)])
+METRICS.register("sky_compute_pool_pending", "gauge", "Jobs running or waiting on the compute pool",
+                 lambda: [({}, COMPUTE_POOL.pending)])
+METRICS.register("sky_compute_pool_rejected_total", "counter", "Jobs refused because the compute pool was full",
+                 lambda: [({}, COMPUTE_POOL.rejected)])
+METRICS.register("sky_coalesced_requests_total", "counter",
+                 "Requests that waited for an identical in-flight computation instead of starting one",
+                 lambda: [({}, RESPONSE_COALESCING.merged)])
+METRICS.register("sky_coalesced_computations_total", "counter", "Computations started for response cache misses",
+                 lambda: [({}, RESPONSE_COALESCING.started)])
+METRICS.register("sky_coalescing_in_flight", "gauge", "Response computations currently in flight",
+                 lambda: [({}, RESPONSE_COALESCING.stats()["in_flight"])])
+METRICS.register("sky_live_subscribers", "gauge", "Open live-update streams",
+                 lambda: [({}, LIVE_HUB.stats()["subscribers"])])
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Stage and request latency histograms plus cache and pool gauges, in Prometheus text format"""
+    return PlainTextResponse(METRICS.render(), media_type="text/plain; version=0.0.4")
\ No newline at end of file
@@ -0,0 +1,156 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Sequence, Tuple
+
+# Latency buckets in seconds, from 50 microseconds to 10 seconds
+LATENCY_BUCKETS = (
+    0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0,
+)
+
+# Samples reported by a gauge/counter callback: (labels, value) pairs
+Samples = Iterable[Tuple[Dict[str, str], float]]
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{value}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Histogram:
+    """
+    Prometheus-style histogram with fixed buckets. Each label combination
+    keeps per-bucket counts, a sum and a count; observing is a bisect and a
+    few additions, cheap enough for the request hot path.
+    """
+
+    def __init__(self, name: str, help_text: str, label_names: Sequence[str], buckets: Sequence[float] = LATENCY_BUCKETS):
+        self.name = name
+        self.help_text = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], List] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values: str) -> None:
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            snapshot = [(labels, list(counts), total, count) for labels, (counts, total, count) in self._series.items()]
+        for labels, counts, total, count in sorted(snapshot):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class _Stage:
+    """Context manager recording the duration of one pipeline stage"""
+    __slots__ = ("histogram", "stage", "started")
+
+    def __init__(self, histogram: Histogram, stage: str):
+        self.histogram = histogram
+        self.stage = stage
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, self.stage)
+        return False
+
+
+class _NoStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NO_STAGE = _NoStage()
+
+
+class MetricsRegistry:
+    """Holds the hot-path histograms plus callbacks sampled at scrape time"""
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.stages = Histogram("sky_stage_duration_seconds", "Time spent in each computation stage", ["stage"])
+        self.requests = Histogram(
+            "sky_http_request_duration_seconds", "HTTP request latency by route", ["method", "route", "status"]
+        )
+        self._callbacks: List[Tuple[str, str, str, Callable[[], Samples]]] = []
+
+    def stage(self, name: str):
+        """Time a block as the named stage: `with METRICS.stage("stars"): ...`"""
+        if not self.enabled:
+            return _NO_STAGE
+        return _Stage(self.stages, name)
+
+    def register(self, name: str, metric_type: str, help_text: str, callback: Callable[[], Samples]) -> None:
+        """Register a gauge or counter whose samples are read when /metrics is scraped"""
+        self._callbacks.append((name, metric_type, help_text, callback))
+
+    def render(self) -> str:
+        lines = self.stages.render() + self.requests.render()
+        for name, metric_type, help_text, callback in self._callbacks:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for labels, value in callback():
+                lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {value}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording the latency of every HTTP request by route template"""
+
+    def __init__(self, app, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.registry.enabled:
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        started = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            self.registry.requests.observe(
+                time.perf_counter() - started,
+                scope["method"], route.path if route is not None else "unmatched", str(status),
+            )
+
+
+METRICS = MetricsRegistry(enabled=os.getenv("METRICS_ENABLED", "1") != "0")
@@ -40,4 +40,30 @@ class ObservationResponse(BaseModel):
     time_used: str
     timezone_info: str
     objects: List[CelestialObject]
-    total_objects_found: int
\ No newline at end of file
+    total_objects_found: int
+
+
+class BatchObservationResult(BaseModel):
+    """Result for one item of a batch observation request"""
+    index: int
+    result: Optional[ObservationResponse] = None
+    error: Optional[str] = None
+
+
+class AlmanacEvent(BaseModel):
+    """Rise/transit/set times (UTC, ISO format) of one object on one day"""
+    name: str
+    type: str
+    magnitude: float
+    rise: Optional[str] = None
+    transit: Optional[str] = None
+    set: Optional[str] = None
+    always_up: bool = False
+    never_up: bool = False
+
+
+class AlmanacResponse(BaseModel):
+    """Response model for the almanac endpoint"""
+    location: dict
+    date: str
+    objects: List[AlmanacEvent]
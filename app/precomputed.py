@@ -0,0 +1,178 @@
+import os
+import sqlite3
+import threading
+import zlib
+from typing import Any, Dict, Iterable, Optional, Tuple
+import ephem
+
+try:
+    from .cache import time_bucket
+    from .encoding import dumps, loads
+    from .utils import SkyObject
+except ImportError:
+    from cache import time_bucket
+    from encoding import dumps, loads
+    from utils import SkyObject
+
+
+# One row per (location, time bucket): the location is stored as integers,
+# latitude and longitude rounded to `decimals` places and scaled by
+# 10**decimals; the bucket is time_bucket() with `bucket_seconds`; the body
+# is the zlib-compressed JSON of the cached observation (everything in the
+# response except the echoed location), with each raw SkyObject record
+# stored as a list of its fields.
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS observations (
+    lat INTEGER NOT NULL,
+    lon INTEGER NOT NULL,
+    bucket INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    PRIMARY KEY (lat, lon, bucket)
+);
+"""
+
+# SQLite memory-maps up to this many bytes of the file, so lookups read
+# straight from pages shared by every worker process
+STORE_MMAP_BYTES = 256 * 1024 * 1024
+
+
+class PrecomputedStore:
+    """
+    SQLite file of observations precomputed for popular locations at a fixed
+    time step, written by `python -m app.build_precomputed`. A request whose
+    rounded location and time bucket match a stored row is answered from the
+    file without computing anything.
+    """
+
+    def __init__(self, path: str, decimals: int = 2, bucket_seconds: float = 60.0):
+        self.path = path
+        self.decimals = decimals
+        self.bucket_seconds = bucket_seconds
+        self.hits = 0
+        self.misses = 0
+        self._connection = None
+        self._pid = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def open(cls, path: str) -> "PrecomputedStore":
+        """Open an existing store read-only, with the rounding it was built with"""
+        store = cls(path)
+        meta = dict(store._connect().execute("SELECT key, value FROM meta"))
+        store.decimals = int(meta["decimals"])
+        store.bucket_seconds = float(meta["bucket_seconds"])
+        return store
+
+    @classmethod
+    def create(cls, path: str, decimals: int, bucket_seconds: float) -> "PrecomputedStore":
+        """Open a store for writing, creating it with the given rounding if needed"""
+        connection = sqlite3.connect(path)
+        with connection:
+            connection.executescript(SCHEMA)
+            connection.execute("PRAGMA journal_mode=WAL")
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if meta and (int(meta["decimals"]) != decimals or float(meta["bucket_seconds"]) != bucket_seconds):
+                raise ValueError(
+                    f"{path} was built with decimals={meta['decimals']}, bucket_seconds={meta['bucket_seconds']}"
+                )
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [("decimals", str(decimals)), ("bucket_seconds", str(bucket_seconds))],
+            )
+        store = cls(path, decimals, bucket_seconds)
+        store._connection, store._pid = connection, os.getpid()
+        return store
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross a fork, so each process opens its own
+        if self._connection is None or self._pid != os.getpid():
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size={STORE_MMAP_BYTES}")
+            self._connection, self._pid = connection, os.getpid()
+        return self._connection
+
+    def key(self, latitude: float, longitude: float, date: ephem.Date) -> Tuple[int, int, int]:
+        scale = 10 ** self.decimals
+        return round(latitude * scale), round(longitude * scale), time_bucket(date, self.bucket_seconds)
+
+    def get(self, latitude: float, longitude: float, date: ephem.Date) -> Optional[Dict[str, Any]]:
+        """The stored observation for the location and time, or None if it is not on the grid"""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT body FROM observations WHERE lat = ? AND lon = ? AND bucket = ?",
+                self.key(latitude, longitude, date),
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+        observation = loads(zlib.decompress(row[0]))
+        objects = observation["objects"]
+        if objects and not isinstance(objects[0], list):
+            # Row written by a build that stored formatted records; recompute it
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        observation["objects"] = [SkyObject(*record) for record in objects]
+        return observation
+
+    def buckets(self, latitude: float, longitude: float) -> set:
+        """Time buckets already stored for a location"""
+        lat, lon, _ = self.key(latitude, longitude, ephem.Date(0))
+        rows = self._connect().execute("SELECT bucket FROM observations WHERE lat = ? AND lon = ?", (lat, lon))
+        return {bucket for (bucket,) in rows}
+
+    def put_many(self, rows: Iterable[Tuple[float, float, ephem.Date, Dict[str, Any]]]) -> None:
+        """Store (latitude, longitude, date, observation) rows"""
+        connection = self._connect()
+        with connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO observations (lat, lon, bucket, body) VALUES (?, ?, ?, ?)",
+                [(*self.key(lat, lon, date), zlib.compress(dumps(self.encode(observation))))
+                 for lat, lon, date, observation in rows],
+            )
+
+    @staticmethod
+    def encode(observation: Dict[str, Any]) -> Dict[str, Any]:
+        """JSON-ready observation: each SkyObject record as a plain list of its fields, without renderings"""
+        return {
+            "time_used": observation["time_used"],
+            "timezone_info": observation["timezone_info"],
+            "objects": [list(record) for record in observation["objects"]],
+        }
+
+    def prune(self, before: ephem.Date) -> int:
+        """Delete rows for time buckets ending before the given date; returns the number deleted"""
+        connection = self._connect()
+        with connection:
+            cursor = connection.execute(
+                "DELETE FROM observations WHERE bucket < ?", (time_bucket(before, self.bucket_seconds),)
+            )
+        return cursor.rowcount
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "path": self.path,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+def load_precomputed_store() -> Optional[PrecomputedStore]:
+    """
+    Open the store named by the PRECOMPUTED_STORE_PATH environment variable,
+    if any and if it has been built yet. Build one with
+    `python -m app.build_precomputed`.
+    """
+    path = os.getenv("PRECOMPUTED_STORE_PATH")
+    if path and os.path.exists(path):
+        return PrecomputedStore.open(path)
+    return None
+
+
+# Opened once at import; connections are made lazily in each process
+PRECOMPUTED_STORE = load_precomputed_store()
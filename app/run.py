@@ -1,15 +1,18 @@
 import uvicorn
 import os
+import sys
 
 if __name__ == "__main__":
     # Use PORT environment variable for Railway/Heroku, default to 8000 for local
     port = int(os.environ.get("PORT", 8000))
-    # Disable reload in production
-    reload = os.environ.get("ENVIRONMENT") == "development"
     
-    uvicorn.run(
-        "app.main:app",
-        host="0.0.0.0",
-        port=port,
-        reload=reload
-    )
\ No newline at end of file
+    if os.environ.get("ENVIRONMENT") == "development":
+        # Auto-reload needs uvicorn's own single-process supervisor
+        uvicorn.run("app.main:app", host="0.0.0.0", port=port, reload=True)
+    else:
+        # Production: preloaded, warmed-up, pre-forked workers
+        try:
+            from .launcher import main as launch
+        except ImportError:
+            from launcher import main as launch
+        sys.exit(launch(["--port", str(port)]))
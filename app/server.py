@@ -1,12 +1,14 @@
 #!/usr/bin/env python3
 """
 Entry point for Railway deployment
-Handles PORT environment variable properly for uvicorn
+Handles PORT environment variable properly; serving is done by the launcher
 """
-import os
-import uvicorn
-from main import app
+import sys
+
+try:
+    from .launcher import main
+except ImportError:
+    from launcher import main
 
 if __name__ == "__main__":
-    port = int(os.environ.get("PORT", 8000))
-    uvicorn.run(app, host="0.0.0.0", port=port)
\ No newline at end of file
+    sys.exit(main())
@@ -0,0 +1,100 @@
+import os
+from functools import lru_cache
+from typing import List, Optional
+import numpy as np
+import pytz
+
+
+# Binary grid layout (little-endian): a header holding the magic, the cell
+# size in degrees, the number of zone names and the byte length of the
+# names block; then the newline-separated zone names; then a uint16 grid of
+# zone ids, one row per latitude band from -90 northwards, one column per
+# longitude band from -180 eastwards. Id 0 means "no zone" (open ocean);
+# id n refers to the n-th name.
+GRID_MAGIC = b"SKYTZ001"
+GRID_HEADER = np.dtype([("magic", "S8"), ("resolution", "<f8"), ("zone_count", "<u4"), ("names_size", "<u4")])
+
+
+class TimezoneGrid:
+    """
+    Timezone ids rasterized onto a regular lat/lon grid, so that a lookup is
+    two multiplications and an array read. The grid is memory-mapped and
+    therefore shared by every worker process reading the same file.
+    """
+
+    def __init__(self, zones: List[str], grid: np.ndarray, resolution: float):
+        self.zones = zones
+        self.grid = grid
+        self.resolution = resolution
+        self.rows, self.cols = grid.shape
+
+    @classmethod
+    def from_file(cls, path: str) -> "TimezoneGrid":
+        header = np.fromfile(path, dtype=GRID_HEADER, count=1)
+        if len(header) != 1 or header["magic"][0] != GRID_MAGIC:
+            raise ValueError(f"{path} is not a timezone grid file")
+        resolution = float(header["resolution"][0])
+        names_size = int(header["names_size"][0])
+
+        with open(path, "rb") as f:
+            f.seek(GRID_HEADER.itemsize)
+            zones = f.read(names_size).decode("utf-8").split("\n")
+        rows, cols = int(round(180 / resolution)), int(round(360 / resolution))
+        grid = np.memmap(path, dtype="<u2", mode="r", offset=GRID_HEADER.itemsize + names_size, shape=(rows, cols))
+        return cls(zones, grid, resolution)
+
+    def write(self, path: str) -> None:
+        names = "\n".join(self.zones).encode("utf-8")
+        header = np.zeros(1, dtype=GRID_HEADER)
+        header["magic"] = GRID_MAGIC
+        header["resolution"] = self.resolution
+        header["zone_count"] = len(self.zones)
+        header["names_size"] = len(names)
+        with open(path, "wb") as f:
+            f.write(header.tobytes())
+            f.write(names)
+            f.write(np.asarray(self.grid, dtype="<u2").tobytes())
+
+    def lookup(self, latitude: float, longitude: float) -> Optional[str]:
+        """Zone name at the given location, or None over open ocean"""
+        row = min(int((latitude + 90.0) / self.resolution), self.rows - 1)
+        col = min(int((longitude + 180.0) / self.resolution), self.cols - 1)
+        zone_id = int(self.grid[row, col])
+        return self.zones[zone_id - 1] if zone_id else None
+
+
+def nautical_timezone(longitude: float) -> str:
+    """Etc/GMT zone of the 15-degree nautical band containing the longitude"""
+    offset = int(round(longitude / 15.0))
+    if offset == 0:
+        return "Etc/GMT"
+    # Etc/GMT zone names use the POSIX sign convention: Etc/GMT+5 is UTC-5
+    return f"Etc/GMT{-offset:+d}"
+
+
+@lru_cache(maxsize=None)
+def get_tzinfo(name: str):
+    """pytz timezone for the name, resolved once per process"""
+    return pytz.timezone(name)
+
+
+# Where the deploy builds write the grid; used when TIMEZONE_GRID_PATH is not set
+DEFAULT_TIMEZONE_GRID_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "timezones.grid")
+
+
+def load_timezone_grid() -> Optional[TimezoneGrid]:
+    """
+    Load the grid named by the TIMEZONE_GRID_PATH environment variable, else
+    the one built next to this module, if any.
+    Build one with `python -m app.build_timezone_grid`.
+    """
+    path = os.getenv("TIMEZONE_GRID_PATH")
+    if path:
+        return TimezoneGrid.from_file(path)
+    if os.path.exists(DEFAULT_TIMEZONE_GRID_PATH):
+        return TimezoneGrid.from_file(DEFAULT_TIMEZONE_GRID_PATH)
+    return None
+
+
+# Loaded once at import; shared by every request
+TIMEZONE_GRID = load_timezone_grid()
@@ -1,9 +1,48 @@
 import ephem
+import heapq
 import math
-from datetime import datetime
-from typing import List, Dict, Any
+from datetime import datetime, timedelta
+from itertools import islice
+from typing import List, Dict, Any, Iterator, NamedTuple, Optional
+import numpy as np
 import pytz
 
+try:
+    from .catalog import STAR_CATALOG, StarPositions
+    from .ephemeris import EPHEMERIS_BACKENDS, EPHEMERIS_CACHES, SolarSystemPositions, SolarSystemSnapshot, compute_snapshot, make_bodies, planned_positions, topocentric_positions
+    from .timezones import TIMEZONE_GRID, nautical_timezone
+    from .metrics import METRICS
+except ImportError:
+    from catalog import STAR_CATALOG, StarPositions
+    from ephemeris import EPHEMERIS_BACKENDS, EPHEMERIS_CACHES, SolarSystemPositions, SolarSystemSnapshot, compute_snapshot, make_bodies, planned_positions, topocentric_positions
+    from timezones import TIMEZONE_GRID, nautical_timezone
+    from metrics import METRICS
+
+
+class SkyObject(NamedTuple):
+    """
+    One object of a result set. RA/Dec stay in radians and are only
+    formatted for display when a response is built from the record.
+    """
+    name: str
+    type: str
+    magnitude: float
+    altitude: float  # degrees, refracted
+    azimuth: float  # degrees from North through East
+    right_ascension: float  # radians, topocentric apparent
+    declination: float  # radians, topocentric apparent
+    distance: Optional[float]  # AU, None where unknown
+
+    @property
+    def is_above_horizon(self) -> bool:
+        return self.altitude > 0
+
+    def display_right_ascension(self) -> str:
+        return format_coordinates(str(ephem.hours(self.right_ascension)))
+
+    def display_declination(self) -> str:
+        return format_declination(str(ephem.degrees(self.declination)))
+
 
 def create_observer(latitude: float, longitude: float, time_str: str = None) -> ephem.Observer:
     """
@@ -17,24 +56,34 @@ def create_observer(latitude: float, longitude: float, time_str: str = None) ->
     observer.lon = str(longitude)
     
     # Set time (convert to UTC)
+    observer.date = parse_observation_time(time_str)
+    
+    return observer
+
+
+def parse_observation_time(time_str: str = None) -> ephem.Date:
+    """
+    Parse an ISO format time into an ephem.Date (UTC).
+    If time is not provided, uses the current UTC time.
+    """
     if time_str:
         # Parse ISO format time
         dt = datetime.fromisoformat(time_str.replace('Z', '+00:00'))
-        observer.date = ephem.Date(dt)
-    else:
-        # Use current UTC time
-        observer.date = ephem.Date(datetime.utcnow())
-    
-    return observer
+        return ephem.Date(dt)
+    # Use current UTC time
+    return ephem.Date(datetime.utcnow())
 
 
 def get_timezone_from_coordinates(latitude: float, longitude: float) -> str:
     """
-    Get approximate timezone from latitude and longitude coordinates.
-    Uses simple longitude-based approximation.
-    For production use, consider using an external API or library.
+    Get timezone from latitude and longitude coordinates.
+    Uses the offline timezone grid (TIMEZONE_GRID_PATH, or the one the deploy
+    builds), with the nautical zone for open ocean, and falls back to a simple
+    longitude-based approximation when there is no grid.
     """
-    return get_approximate_timezone(longitude)
+    if TIMEZONE_GRID is None:
+        return get_approximate_timezone(longitude)
+    return TIMEZONE_GRID.lookup(latitude, longitude) or nautical_timezone(longitude)
 
 
 def get_approximate_timezone(longitude: float) -> str:
@@ -56,157 +105,191 @@ def get_approximate_timezone(longitude: float) -> str:
     return "UTC"
 
 
-def get_bright_objects(observer: ephem.Observer, max_objects: int = 20) -> List[Dict[str, Any]]:
+def get_bright_objects(observer: ephem.Observer, max_objects: int = 20, precision: str = "precise") -> List[SkyObject]:
     """
     Get the brightest celestial objects above the horizon.
     Returns a list sorted by brightness (magnitude).
     """
-    objects = []
-    
-    # Define celestial objects to check
-    celestial_objects = [
-        # Sun and Moon
-        (ephem.Sun(), "Sun"),
-        (ephem.Moon(), "Moon"),
-        
-        # Planets
-        (ephem.Mercury(), "Mercury"),
-        (ephem.Venus(), "Venus"),
-        (ephem.Mars(), "Mars"),
-        (ephem.Jupiter(), "Jupiter"),
-        (ephem.Saturn(), "Saturn"),
-        (ephem.Uranus(), "Uranus"),
-        (ephem.Neptune(), "Neptune"),
-    ]
-    
-    # Jupiter's Galilean moons
-    jupiter_moons = [
-        (ephem.Io(), "Io"),
-        (ephem.Europa(), "Europa"),
-        (ephem.Ganymede(), "Ganymede"),
-        (ephem.Callisto(), "Callisto"),
-    ]
-    
-    # Extended bright stars catalog with more accurate magnitudes
-    # Format: (Name, RA_hours:minutes:seconds, Dec_degrees:arcmin:arcsec, magnitude)
-    bright_stars = [
-        ("Sirius", "6:45:08.9", "-16:42:58", -1.46),
-        ("Canopus", "6:23:57.1", "-52:41:44", -0.72),
-        ("Arcturus", "14:15:39.7", "+19:10:57", -0.04),
-        ("Vega", "18:36:56.3", "+38:47:01", 0.03),
-        ("Capella", "5:16:41.4", "+45:59:53", 0.08),
-        ("Rigel", "5:14:32.3", "-8:12:06", 0.13),
-        ("Procyon", "7:39:18.1", "+5:13:30", 0.38),
-        ("Betelgeuse", "5:55:10.3", "+7:24:26", 0.42),
-        ("Achernar", "1:37:42.8", "-57:14:12", 0.46),
-        ("Hadar", "14:3:49.4", "-60:22:23", 0.61),
-        ("Altair", "19:50:47.0", "+8:52:06", 0.77),
-        ("Aldebaran", "4:35:55.2", "+16:30:33", 0.87),
-        ("Antares", "16:29:24.4", "-26:25:55", 0.96),
-        ("Spica", "13:25:11.6", "-11:9:41", 0.98),
-        ("Pollux", "7:45:18.9", "+28:1:34", 1.14),
-        ("Fomalhaut", "22:57:39.0", "-29:37:20", 1.16),
-        ("Deneb", "20:41:25.9", "+45:16:49", 1.25),
-        ("Mimosa", "12:47:43.3", "-59:41:19", 1.25),
-        ("Regulus", "10:8:22.3", "+11:58:02", 1.36),
-        ("Adhara", "6:58:37.5", "-28:58:19", 1.50),
-        ("Castor", "7:34:36.0", "+31:53:19", 1.58),
-        ("Shaula", "17:33:36.5", "-37:6:14", 1.62),
-        ("Bellatrix", "5:25:7.9", "+6:20:59", 1.64),
-        ("Elnath", "5:26:17.5", "+28:36:27", 1.65),
-        ("Miaplacidus", "9:13:12.2", "-69:43:02", 1.67),
-        ("Alnilam", "5:36:12.8", "-1:12:07", 1.69),
-        ("Alnitak", "5:40:45.6", "-2:27:30", 1.74),
-        ("Alnair", "22:8:13.9", "-46:57:40", 1.74),
-        ("Alioth", "12:54:1.6", "+55:57:35", 1.76),
-        ("Alkaid", "13:47:32.4", "+49:18:48", 1.86),
-        ("Polaris", "2:31:49.0", "+89:15:51", 1.97),
-        ("Kochab", "14:50:42.3", "+74:9:20", 2.07),
-        ("Alrescha", "2:2:2.6", "+2:45:50", 3.62),
-        ("Almach", "2:3:53.9", "+42:19:47", 2.09),
-        ("Gamma Ceti", "2:43:18.0", "+3:14:09", 3.47),
-        ("Epsilon Eridani", "3:32:55.8", "-9:27:30", 3.73),
-    ]
+    return get_bright_objects_batch([observer], max_objects, precision)[0]
+
+
+def get_bright_objects_batch(observers: List[ephem.Observer], max_objects: int = 20,
+                             precision: str = "precise") -> List[List[SkyObject]]:
+    """
+    Get the brightest celestial objects above the horizon for many observers.
+    Star transforms are vectorized across the whole batch, and observers in
+    the same time bucket share one solar-system ephemeris computation, made
+    by the EPHEMERIS_BACKENDS engine named by `precision`.
+    Returns one list per observer, sorted by brightness (magnitude).
+    """
+    ephemeris_cache = EPHEMERIS_CACHES[precision]
+    with METRICS.stage("stars"):
+        star_positions = STAR_CATALOG.brightest_visible_batch(observers, max_objects)
     
-    # Process planets and Sun/Moon
-    for obj, name in celestial_objects:
-        try:
-            obj.compute(observer)
-            alt = math.degrees(obj.alt)
-            mag = obj.mag if hasattr(obj, 'mag') else -26.74  # Sun's magnitude
-            distance = obj.earth_distance if hasattr(obj, 'earth_distance') else None
-            
-            objects.append({
-                "name": name,
-                "type": "planet" if name not in ["Sun", "Moon"] else name.lower(),
-                "magnitude": mag,
-                "altitude": alt,
-                "azimuth": math.degrees(obj.az),
-                "right_ascension": format_coordinates(str(obj.ra)),
-                "declination": format_declination(str(obj.dec)),
-                "is_above_horizon": alt > 0,
-                "distance": distance
-            })
-        except Exception as e:
-            # Some objects might not be visible or computable
-            continue
+    # Sun, Moon, planets and Galilean moons: geocentric positions come from the
+    # time-bucketed ephemeris cache, with the batch's missing buckets computed
+    # in one call; only the horizon transform is per observer
+    with METRICS.stage("solar_system"):
+        snapshots = ephemeris_cache.snapshots([observer.date for observer in observers])
     
-    # Process Jupiter's Galilean moons
-    for moon, moon_name in jupiter_moons:
-        try:
-            moon.compute(observer)
-            alt = math.degrees(moon.alt)
-            # Galilean moons are typically magnitude 4.6 to 6.0
-            mag = moon.mag if hasattr(moon, 'mag') else 5.5
-            
-            objects.append({
-                "name": moon_name,
-                "type": "moon",
-                "magnitude": mag,
-                "altitude": alt,
-                "azimuth": math.degrees(moon.az),
-                "right_ascension": format_coordinates(str(moon.ra)),
-                "declination": format_declination(str(moon.dec)),
-                "is_above_horizon": alt > 0,
-                "distance": None
-            })
-        except Exception as e:
-            continue
+    results = []
+    for observer, positions, snapshot in zip(observers, star_positions, snapshots):
+        with METRICS.stage("solar_system"):
+            solar = topocentric_positions(snapshot, observer)
+        with METRICS.stage("merge"):
+            results.append(_collect_bright_objects(solar, positions, max_objects))
+    return results
+
+
+def track_steps(start: ephem.Date, end: ephem.Date, step_seconds: float) -> int:
+    """
+    Number of samples from start to end inclusive. The range is rounded to
+    whole milliseconds and the division allows for float error in the step,
+    so a range that is an exact multiple of the step keeps its end sample.
+    """
+    span_ms = round((float(end) - float(start)) * 86400000.0)
+    return int(span_ms / (step_seconds * 1000.0) + 1e-6) + 1
+
+
+def iter_sky_track(latitude: float, longitude: float, start: ephem.Date, end: ephem.Date,
+                   step_seconds: float, names: List[str] = None, max_objects: int = 20,
+                   precision: str = "precise") -> Iterator[Dict[str, Any]]:
+    """
+    Yield one record per time step from start to end (inclusive) with the
+    brightest objects above the horizon, or with the named objects whether
+    they are up or not. A single observer and one set of PyEphem bodies are
+    reused for every step, so memory stays flat however long the range is.
+    With precision="fast", solar-system snapshots are computed a batch of
+    steps at a time by the vectorized analytical engine instead.
+    """
+    observer = create_observer(latitude, longitude)
+    bodies = make_bodies()
+    wanted = {name.lower() for name in names} if names else None
+    star_rows = None
+    if wanted:
+        star_rows = [row for row in (STAR_CATALOG.find(name) for name in wanted) if row is not None]
     
-    # Process bright stars with accurate magnitudes
-    for star_entry in bright_stars:
-        star_name = star_entry[0]
-        ra_str = star_entry[1]
-        dec_str = star_entry[2]
-        mag = star_entry[3]
+    steps = track_steps(start, end, step_seconds)
+    snapshots = None
+    if precision != "precise":
+        snapshots = _batched_snapshots(EPHEMERIS_BACKENDS[precision], start, step_seconds, steps)
+    for n in range(steps):
+        observer.date = ephem.Date(float(start) + n * step_seconds / 86400.0)
+        snapshot = next(snapshots) if snapshots is not None else None
+        # Tracks walk through many time buckets, so they bypass the shared
+        # ephemeris cache rather than evicting everybody else's entries
+        if wanted:
+            solar = topocentric_positions(snapshot if snapshot is not None else compute_snapshot(observer.date, bodies), observer)
+            objects = [
+                obj for obj in _object_records(solar, STAR_CATALOG.horizontal(observer, star_rows))
+                if obj.name.lower() in wanted
+            ]
+        else:
+            # Stars first: once max_objects stars are up, bodies that can never
+            # outshine the faintest of them are not computed at all
+            stars = STAR_CATALOG.brightest_visible(observer, max_objects)
+            if snapshot is not None:
+                solar = topocentric_positions(snapshot, observer)
+            else:
+                cutoff = math.inf
+                if len(stars.index) >= max_objects:
+                    cutoff = float(STAR_CATALOG.magnitude[stars.index[max_objects - 1]])
+                solar = planned_positions(observer, bodies, cutoff)
+            objects = _collect_bright_objects(solar, stars, max_objects)
         
-        try:
-            star = ephem.FixedBody()
-            star._ra = ephem.hours(ra_str)
-            star._dec = ephem.degrees(dec_str)
-            star.compute(observer)
-            
-            alt = math.degrees(star.alt)
-            
-            objects.append({
-                "name": star_name,
-                "type": "star",
-                "magnitude": mag,
-                "altitude": alt,
-                "azimuth": math.degrees(star.az),
-                "right_ascension": format_coordinates(str(star.ra)),
-                "declination": format_declination(str(star.dec)),
-                "is_above_horizon": alt > 0,
-                "distance": None
-            })
-        except Exception as e:
-            continue
-    
-    # Filter objects above horizon and sort by brightness (lower magnitude = brighter)
-    above_horizon = [obj for obj in objects if obj["is_above_horizon"]]
-    sorted_objects = sorted(above_horizon, key=lambda x: x["magnitude"])
+        yield {
+            "time": format_utc(observer.date),
+            "objects": [
+                {
+                    "name": obj.name,
+                    "type": obj.type,
+                    "magnitude": round(obj.magnitude, 2),
+                    "altitude": round(obj.altitude, 2),
+                    "azimuth": round(obj.azimuth, 2),
+                    "is_above_horizon": obj.is_above_horizon
+                }
+                for obj in objects
+            ]
+        }
+
+
+def _batched_snapshots(backend, start: ephem.Date, step_seconds: float, steps: int) -> Iterator[SolarSystemSnapshot]:
+    """Snapshots for each of `steps` time steps from start, computed batch_size steps per backend call"""
+    for first in range(0, steps, backend.batch_size):
+        yield from backend.snapshots([
+            ephem.Date(float(start) + n * step_seconds / 86400.0)
+            for n in range(first, min(steps, first + backend.batch_size))
+        ])
+
+
+def _solar_record(solar: SolarSystemPositions, i: int) -> SkyObject:
+    """Record for the i-th solar-system body"""
+    snapshot = solar.snapshot
+    distance = float(snapshot.distance[i])
+    return SkyObject(
+        snapshot.names[i],
+        snapshot.types[i],
+        float(snapshot.magnitude[i]),
+        float(solar.altitude[i]),
+        float(solar.azimuth[i]),
+        float(solar.right_ascension[i]),
+        float(solar.declination[i]),
+        None if math.isnan(distance) else distance,
+    )
+
+
+def _star_record(positions: StarPositions, i: int) -> SkyObject:
+    """Record for the i-th star position"""
+    row = positions.index[i]
+    return SkyObject(
+        STAR_CATALOG.name(row),
+        "star",
+        float(STAR_CATALOG.magnitude[row]),
+        float(positions.altitude[i]),
+        float(positions.azimuth[i]),
+        float(positions.right_ascension[i]),
+        float(positions.declination[i]),
+        None,
+    )
+
+
+def _object_records(solar: SolarSystemPositions, positions: StarPositions) -> List[SkyObject]:
+    """One record per solar-system body and per star position"""
+    return (
+        [_solar_record(solar, i) for i in range(len(solar.snapshot.names))]
+        + [_star_record(positions, i) for i in range(len(positions.index))]
+    )
+
+
+def _collect_bright_objects(solar: SolarSystemPositions, positions: StarPositions, max_objects: int) -> List[SkyObject]:
+    """
+    Merge solar-system bodies with the observer's visible stars into the top
+    max_objects. Stars were walked brightest-first over the precompiled
+    catalog, so only the first max_objects visible stars are passed in.
+    Both are merged as magnitude-ordered streams through a heap that stops
+    after max_objects, so records are only built for objects that make it.
+    """
+    # Bodies below the horizon, or skipped and hence NaN, drop out here
+    magnitude = solar.snapshot.magnitude
+    bodies = sorted(
+        ((float(magnitude[i]), _solar_record, solar, int(i)) for i in np.flatnonzero(solar.altitude > 0)),
+        key=lambda entry: entry[0]
+    )
+    stars = (
+        (float(STAR_CATALOG.magnitude[row]), _star_record, positions, i)
+        for i, row in enumerate(positions.index) if positions.altitude[i] > 0
+    )
     
-    return sorted_objects[:max_objects]
+    # On equal magnitudes bodies stay ahead of stars, as with a stable sort
+    top = islice(heapq.merge(bodies, stars, key=lambda entry: entry[0]), max_objects)
+    return [record(source, i) for _, record, source, i in top]
+
+
+def format_utc(date: ephem.Date) -> str:
+    """Format an ephem.Date as an ISO UTC timestamp rounded to the second"""
+    dt = date.datetime()
+    dt = dt.replace(microsecond=0) + timedelta(seconds=round(dt.microsecond / 1e6))
+    return dt.isoformat() + "Z"
 
 
 def format_coordinates(coord: str) -> str:
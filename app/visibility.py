@@ -0,0 +1,153 @@
+import math
+import os
+from typing import List, NamedTuple, Optional, Tuple
+import numpy as np
+import ephem
+
+try:
+    from .astro import julian_date, precess_from_j2000, refraction
+    from .catalog import STAR_CATALOG
+    from .ephemeris import AU_KM, EARTH_FLATTENING_RATIO, EARTH_RADIUS_KM, EPHEMERIS_CACHES, SOLAR_SYSTEM_BODIES, topocentric_correction
+except ImportError:
+    from astro import julian_date, precess_from_j2000, refraction
+    from catalog import STAR_CATALOG
+    from ephemeris import AU_KM, EARTH_FLATTENING_RATIO, EARTH_RADIUS_KM, EPHEMERIS_CACHES, SOLAR_SYSTEM_BODIES, topocentric_correction
+
+
+# Finest grid spacing served, in degrees (0.25 is 720 x 1440 cells)
+VISIBILITY_MIN_RESOLUTION = float(os.getenv("VISIBILITY_MIN_RESOLUTION", "0.25"))
+
+# Binary rasters hold altitudes as int16 in units of this many degrees
+ALTITUDE_SCALE = 0.1
+
+# Observers on the map stand at sea level in PyEphem's default atmosphere
+MAP_PRESSURE = 1010.0
+MAP_TEMPERATURE = 15.0
+
+# Bodies with a smaller horizontal parallax (every one but the Moon) are
+# treated as infinitely far away; the shift is below the raster's precision
+MIN_PARALLAX = math.radians(1.0 / 60.0)
+
+
+class VisibilityMap(NamedTuple):
+    """Altitude of one object over a global latitude/longitude grid"""
+    name: str
+    type: str
+    date: ephem.Date
+    right_ascension: float  # radians, geocentric apparent
+    declination: float  # radians, geocentric apparent
+    sidereal_time: float  # radians, Greenwich apparent
+    latitudes: np.ndarray  # row centres in degrees, north to south
+    longitudes: np.ndarray  # column centres in degrees, west to east
+    altitude: np.ndarray  # (rows, cols) degrees, refracted
+
+    @property
+    def resolution(self) -> float:
+        return 180.0 / len(self.latitudes)
+
+    @property
+    def subpoint(self) -> Tuple[float, float]:
+        """Latitude/longitude (degrees) where the object is at the zenith"""
+        longitude = math.degrees(self.right_ascension - self.sidereal_time)
+        return math.degrees(self.declination), (longitude + 180.0) % 360.0 - 180.0
+
+
+def grid_axes(resolution: float) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cell-centre latitudes (north to south) and longitudes (west to east) of
+    a global grid with the given spacing in degrees, which must divide 180.
+    """
+    rows = int(round(180.0 / resolution))
+    if rows < 1 or abs(rows * resolution - 180.0) > 1e-6:
+        raise ValueError("resolution must divide 180 degrees evenly")
+    step = 180.0 / rows
+    latitudes = 90.0 - step * (np.arange(rows) + 0.5)
+    longitudes = -180.0 + step * (np.arange(2 * rows) + 0.5)
+    return latitudes, longitudes
+
+
+def geocentric_position(name: str, date: ephem.Date,
+                        precision: str = "precise") -> Optional[Tuple[str, str, float, float, float]]:
+    """
+    (name, type, ra, dec, distance in AU or NaN) of a solar-system body or
+    catalog star at the given time, or None if there is no such object.
+    Solar-system bodies come from the shared ephemeris snapshot cache.
+    """
+    key = name.lower()
+    for i, (body_name, _, object_type) in enumerate(SOLAR_SYSTEM_BODIES):
+        if body_name.lower() == key:
+            snapshot = EPHEMERIS_CACHES[precision].snapshot(date)
+            return body_name, object_type, float(snapshot.ra[i]), float(snapshot.dec[i]), float(snapshot.distance[i])
+
+    row = STAR_CATALOG.find(name)
+    if row is None:
+        return None
+    ra, dec = precess_from_j2000(STAR_CATALOG.ra[row:row + 1], STAR_CATALOG.dec[row:row + 1], julian_date(date))
+    return STAR_CATALOG.name(row), "star", float(ra[0]), float(dec[0]), math.nan
+
+
+def altitude_grid(ra: float, dec: float, distance: float, sidereal_time: float,
+                  latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Refracted altitude in degrees of one object for sea-level observers on
+    every latitude (rows) x longitude (columns) cell, in one broadcast pass.
+    Parallax is applied where it reaches MIN_PARALLAX (the Moon's is about a
+    degree); the geocentric position is shared by every cell.
+    """
+    latitude = np.radians(latitudes)[:, None]
+    hour_angle = (sidereal_time + np.radians(longitudes) - ra)[None, :]
+    sin_lat, cos_lat = np.sin(latitude), np.cos(latitude)
+
+    if math.isnan(distance) or EARTH_RADIUS_KM / (distance * AU_KM) < MIN_PARALLAX:
+        # No parallax: altitude is separable, so the trigonometry runs on
+        # one row and one column and only the sum fills the grid
+        sin_alt = sin_lat * math.sin(dec) + cos_lat * (math.cos(dec) * np.cos(hour_angle))
+    else:
+        u = np.arctan(EARTH_FLATTENING_RATIO * np.tan(latitude))
+        delta_ra, topocentric_dec = topocentric_correction(
+            dec, distance, hour_angle, EARTH_FLATTENING_RATIO * np.sin(u), np.cos(u))
+        sin_alt = (sin_lat * np.sin(topocentric_dec)
+                   + cos_lat * np.cos(topocentric_dec) * np.cos(hour_angle - delta_ra))
+
+    # The altitude half of equatorial_to_horizontal; azimuth is not needed
+    alt = np.arcsin(np.clip(sin_alt, -1.0, 1.0, out=sin_alt), out=sin_alt)
+    alt_deg = np.degrees(alt)
+    alt_deg += refraction(alt_deg, MAP_PRESSURE, MAP_TEMPERATURE)
+    return alt_deg
+
+
+def compute_visibility_map(name: str, date: ephem.Date, resolution: float,
+                           precision: str = "precise") -> Optional[VisibilityMap]:
+    """Altitude raster of the named object over the globe, or None if the object is unknown"""
+    position = geocentric_position(name, date, precision)
+    if position is None:
+        return None
+    name, object_type, ra, dec, distance = position
+    latitudes, longitudes = grid_axes(resolution)
+
+    greenwich = ephem.Observer()
+    greenwich.date = date
+    sidereal_time = float(greenwich.sidereal_time())
+
+    altitude = altitude_grid(ra, dec, distance, sidereal_time, latitudes, longitudes)
+    return VisibilityMap(name, object_type, date, ra, dec, sidereal_time, latitudes, longitudes, altitude)
+
+
+def run_lengths(mask: np.ndarray) -> List[int]:
+    """
+    Run-length encoding of a boolean grid flattened row by row: alternating
+    counts of False and True cells, always starting with False (so the
+    first count is 0 when the grid starts with True).
+    """
+    flat = np.ravel(mask)
+    if flat.size == 0:
+        return []
+    changes = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    bounds = np.concatenate(([0], changes, [flat.size]))
+    runs = np.diff(bounds).tolist()
+    return [0] + runs if flat[0] else runs
+
+
+def encode_altitudes(altitude: np.ndarray) -> bytes:
+    """Row-major little-endian int16 raster of altitudes in ALTITUDE_SCALE degree units"""
+    return np.round(altitude / ALTITUDE_SCALE).astype("<i2").tobytes()
@@ -0,0 +1,116 @@
+import asyncio
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, Optional
+
+
+class PoolOverloaded(Exception):
+    """Raised when the compute pool's queue is full and the job is refused"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is busy, please retry shortly")
+        self.retry_after = retry_after
+
+
+class ComputePool:
+    """
+    Runs CPU-bound ephemeris work off the asyncio event loop on a thread or
+    process pool. At most `workers + queue_size` jobs may be running or
+    waiting at once; further jobs are refused immediately with
+    PoolOverloaded so callers can shed load instead of queueing forever.
+    """
+
+    def __init__(self, kind: str = "thread", workers: Optional[int] = None,
+                 queue_size: int = 64, retry_after: int = 1):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown compute pool kind: {kind}")
+        self.kind = kind
+        self.workers = workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.retry_after = retry_after
+        self.pending = 0
+        self.rejected = 0
+        self._executor: Optional[Executor] = None
+
+    @property
+    def max_pending(self) -> int:
+        return self.workers + self.queue_size
+
+    @property
+    def queue_depth(self) -> int:
+        """Jobs accepted but not yet picked up by a worker"""
+        return max(0, self.pending - self.workers)
+
+    def _get_executor(self) -> Executor:
+        # Created lazily so that importing the app never forks or spawns workers
+        if self._executor is None:
+            if self.kind == "process":
+                self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            else:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="compute")
+        return self._executor
+
+    def _admit(self) -> None:
+        """Take a slot, or raise PoolOverloaded if the pool is full"""
+        if self.pending >= self.max_pending:
+            self.rejected += 1
+            raise PoolOverloaded(self.retry_after)
+        self.pending += 1
+
+    async def run(self, fn: Callable, *args, **kwargs) -> Any:
+        """Run fn(*args, **kwargs) on the pool, or raise PoolOverloaded if it is full"""
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), partial(fn, *args, **kwargs))
+        finally:
+            self.pending -= 1
+
+    async def stream(self, iterator: Iterator) -> AsyncIterator:
+        """
+        Advance a long-running iterator (such as a streamed response) off the
+        event loop, holding one slot for its whole lifetime. The slot is taken
+        on the first step, which raises PoolOverloaded if the pool is full, so
+        callers should await that step before starting a response. Iterators
+        carry state and cannot be sent to another process, so with a process
+        pool the steps run on the loop's default executor instead.
+        """
+        self._admit()
+        try:
+            loop = asyncio.get_running_loop()
+            executor = self._get_executor() if self.kind == "thread" else None
+            done = object()
+            while True:
+                item = await loop.run_in_executor(executor, next, iterator, done)
+                if item is done:
+                    return
+                yield item
+        finally:
+            self.pending -= 1
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "kind": self.kind,
+            "workers": self.workers,
+            "queue_size": self.queue_size,
+            "pending": self.pending,
+            "queue_depth": self.queue_depth,
+            "rejected": self.rejected,
+        }
+
+
+def create_compute_pool() -> ComputePool:
+    """Build the compute pool from the COMPUTE_POOL_* environment variables"""
+    workers = os.getenv("COMPUTE_POOL_WORKERS")
+    return ComputePool(
+        kind=os.getenv("COMPUTE_POOL", "thread"),
+        workers=int(workers) if workers else None,
+        queue_size=int(os.getenv("COMPUTE_POOL_QUEUE_SIZE", "64")),
+        retry_after=int(os.getenv("COMPUTE_POOL_RETRY_AFTER", "1")),
+    )
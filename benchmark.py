@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the Bright Celestial Objects API
+
+Times the computation core as microbenchmarks and runs an in-process
+end-to-end benchmark of /api/bright-objects through an ASGI transport
+(no network, no running server needed).
+
+    python benchmark.py                          # run and print results
+    python benchmark.py --save baseline.json     # store a baseline
+    python benchmark.py --compare baseline.json  # fail if p50/p99 regressed
+
+Baselines are machine-specific: compare against one recorded on the same box.
+"""
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+import ephem
+import httpx
+
+from app.encoding import dumps
+from app.ephemeris import EPHEMERIS_BACKENDS
+from app.main import app, build_observation, encode_observation, location_info, object_records, observation_response, RESPONSE_CACHE
+from app.models import CelestialObject, ObservationResponse
+from app.utils import create_observer, format_coordinates, format_declination, get_bright_objects
+
+# Fixed inputs so runs are comparable
+LATITUDE, LONGITUDE, TIME = 40.7128, -74.0060, "2026-01-15T22:00:00"
+
+
+def summarize(samples_us, total_seconds=None, operations=None):
+    """p50/p99/mean of per-operation latencies in microseconds"""
+    ordered = sorted(samples_us)
+    result = {
+        "p50_us": round(ordered[len(ordered) // 2], 3),
+        "p99_us": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))], 3),
+        "mean_us": round(statistics.fmean(ordered), 3),
+        "samples": len(ordered),
+    }
+    if total_seconds:
+        result["ops_per_sec"] = round(operations / total_seconds, 1)
+    return result
+
+
+def microbenchmark(fn, samples, inner=1):
+    """
+    Time `samples` batches of `inner` calls and report per-call latency.
+    Batching keeps timer overhead out of sub-microsecond functions.
+    """
+    for _ in range(min(samples, 50)):
+        fn()
+    timings = []
+    started = time.perf_counter()
+    for _ in range(samples):
+        t0 = time.perf_counter()
+        for _ in range(inner):
+            fn()
+        timings.append((time.perf_counter() - t0) / inner * 1e6)
+    return summarize(timings, time.perf_counter() - started, samples * inner)
+
+
+def run_microbenchmarks(samples):
+    observer = create_observer(LATITUDE, LONGITUDE, TIME)
+    raw_objects = get_bright_objects(observer)
+    observation = build_observation(LATITUDE, LONGITUDE, observer, raw_objects)
+
+    def build_models():
+        objects = [CelestialObject(**obj) for obj in object_records(observation["objects"])]
+        return ObservationResponse(
+            location=location_info(LATITUDE, LONGITUDE),
+            time_used=observation["time_used"],
+            timezone_info=observation["timezone_info"],
+            objects=objects,
+            total_objects_found=len(objects)
+        )
+
+    response = build_models()
+    # One hour of minute buckets: what the fast engine fills per cache miss
+    hour = [ephem.Date(observer.date + minute / 1440.0) for minute in range(60)]
+    return {
+        "create_observer": microbenchmark(lambda: create_observer(LATITUDE, LONGITUDE, TIME), samples, inner=20),
+        "get_bright_objects": microbenchmark(lambda: get_bright_objects(observer), samples),
+        "ephemeris_precise_1h": microbenchmark(lambda: EPHEMERIS_BACKENDS["precise"].snapshots(hour), samples),
+        "ephemeris_fast_1h": microbenchmark(lambda: EPHEMERIS_BACKENDS["fast"].snapshots(hour), samples),
+        "format_coordinates": microbenchmark(lambda: format_coordinates("6:45:08.90"), samples, inner=200),
+        "format_declination": microbenchmark(lambda: format_declination("-16:42:58.0"), samples, inner=200),
+        "build_response_models": microbenchmark(build_models, samples, inner=5),
+        "serialize_response": microbenchmark(response.model_dump_json, samples, inner=5),
+        "encode_response": microbenchmark(
+            lambda: dumps(observation_response(LATITUDE, LONGITUDE, observation)), samples, inner=20
+        ),
+        "encode_response_columns": microbenchmark(
+            lambda: encode_observation(LATITUDE, LONGITUDE, observation, "columns"), samples, inner=20
+        ),
+    }
+
+
+async def run_endpoint_benchmark(requests, concurrency, cached):
+    """
+    Drive /api/bright-objects in-process with `concurrency` concurrent
+    clients. Uncached runs use a distinct location per request so every one
+    misses the response cache; cached runs repeat one location.
+    """
+    RESPONSE_CACHE.clear()
+    rng = random.Random(42)
+    if cached:
+        params = [{"latitude": LATITUDE, "longitude": LONGITUDE, "time": TIME}] * requests
+    else:
+        params = [
+            {"latitude": round(rng.uniform(-60, 60), 4), "longitude": round(rng.uniform(-180, 180), 4), "time": TIME}
+            for _ in range(requests)
+        ]
+
+    latencies = []
+    errors = 0
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        queue = asyncio.Queue()
+        for p in params:
+            queue.put_nowait(p)
+
+        async def worker():
+            nonlocal errors
+            while not queue.empty():
+                p = queue.get_nowait()
+                t0 = time.perf_counter()
+                response = await client.get("/api/bright-objects", params=p)
+                latencies.append((time.perf_counter() - t0) * 1e6)
+                if response.status_code != 200:
+                    errors += 1
+
+        # Warm up caches and lazily created pools outside the timed section
+        warm_up = params[0] if cached else {"latitude": 0, "longitude": 0, "time": TIME}
+        await client.get("/api/bright-objects", params=warm_up)
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    result = summarize(latencies, elapsed, len(latencies))
+    result["errors"] = errors
+    return result
+
+
+def run_all(samples, requests, concurrency):
+    results = run_microbenchmarks(samples)
+    results["endpoint_uncached"] = asyncio.run(run_endpoint_benchmark(requests, concurrency, cached=False))
+    results["endpoint_cached"] = asyncio.run(run_endpoint_benchmark(requests, concurrency, cached=True))
+    return {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "samples": samples,
+            "requests": requests,
+            "concurrency": concurrency,
+        },
+        "results": results,
+    }
+
+
+def compare(current, baseline, threshold):
+    """Print a comparison table and return the names of regressed benchmarks"""
+    regressions = []
+    print(f"\n{'benchmark':24} {'metric':6} {'baseline':>12} {'current':>12} {'change':>8}")
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in ("p50_us", "p99_us"):
+            change = result[metric] / base[metric] - 1 if base[metric] else 0.0
+            flag = "  REGRESSED" if change > threshold else ""
+            print(f"{name:24} {metric[:3]:6} {base[metric]:12.1f} {result[metric]:12.1f} {change:+8.1%}{flag}")
+            if flag:
+                regressions.append(f"{name} {metric}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the computation core and the HTTP endpoint")
+    parser.add_argument("--samples", type=int, default=300, help="Samples per microbenchmark")
+    parser.add_argument("--requests", type=int, default=500, help="Requests per endpoint benchmark")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent in-process clients")
+    parser.add_argument("--save", metavar="PATH", help="Write results as a JSON baseline")
+    parser.add_argument("--compare", metavar="PATH", help="Compare against a JSON baseline")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed p50/p99 slowdown before --compare fails (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    current = run_all(args.samples, args.requests, args.concurrency)
+    for name, result in current["results"].items():
+        extra = f"  {result['ops_per_sec']:>10.1f} ops/s" if "ops_per_sec" in result else ""
+        print(f"{name:24} p50 {result['p50_us']:10.1f} us  p99 {result['p99_us']:10.1f} us{extra}")
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump(current, f, indent=2)
+        print(f"\nBaseline written to {args.save}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare(current, baseline, args.threshold)
+        if regressions:
+            print(f"\nRegressions beyond {args.threshold:.0%}: {', '.join(regressions)}")
+            return 1
+        print("\nNo regressions")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
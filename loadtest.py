@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+"""
+Load generator for the Bright Celestial Objects API
+
+Replays a traffic mix against /api/bright-objects with a ramp of concurrent
+clients and reports throughput, latency percentiles and error rates as JSON.
+
+    python loadtest.py                                  # the app in-process (ASGI transport)
+    python loadtest.py --url http://127.0.0.1:8000      # a server that is already running
+    python loadtest.py --serve --workers 4              # start the launcher locally, then load it
+    python loadtest.py --ramp 1,8,32,128 --duration 10 --output load.json
+
+Each stage runs `concurrency` closed-loop clients (each sends its next
+request as soon as the previous one completes) for `--duration` seconds.
+Requests are drawn from the scenarios in --mix:
+
+    city_now     a quick-city location at the current time (mostly cache hits)
+    city_time    a quick-city location at an explicit minute within the next day
+    random_now   random coordinates at the current time (response cache misses)
+    random_time  random coordinates at an explicit minute within the next day
+
+In-process runs share one event loop and CPU between the clients and the app,
+so they suit comparing changes; use --url/--serve for capacity numbers.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import signal
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+
+from app.locations import QUICK_CITIES
+
+DEFAULT_MIX = "city_now=40,city_time=20,random_now=20,random_time=20"
+SCENARIOS = ("city_now", "city_time", "random_now", "random_time")
+
+# Seconds to wait for a --serve server to pass its health check
+SERVE_STARTUP_TIMEOUT = 120.0
+
+
+def parse_mix(value):
+    """'name=weight,...' -> {name: weight}"""
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in SCENARIOS:
+            raise argparse.ArgumentTypeError(f"Unknown scenario {name!r}; expected one of {', '.join(SCENARIOS)}")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise argparse.ArgumentTypeError(f"Bad weight for {name}: {weight!r}")
+    if not any(weight > 0 for weight in mix.values()):
+        raise argparse.ArgumentTypeError("At least one scenario needs a positive weight")
+    return mix
+
+
+def parse_param(value):
+    key, sep, param_value = value.partition("=")
+    if not sep or not key:
+        raise argparse.ArgumentTypeError(f"Expected KEY=VALUE, got {value!r}")
+    return key, param_value
+
+
+def parse_ramp(value):
+    try:
+        ramp = [int(part) for part in value.split(",")]
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"Expected comma-separated client counts, got {value!r}")
+    if not ramp or min(ramp) < 1:
+        raise argparse.ArgumentTypeError("Client counts must be at least 1")
+    return ramp
+
+
+class TrafficMix:
+    """Draws (scenario, query parameters) pairs for the configured mix"""
+
+    def __init__(self, mix, seed, extra_params=None):
+        self.names = list(mix)
+        self.weights = [mix[name] for name in self.names]
+        self.rng = random.Random(seed)
+        self.extra_params = extra_params or {}
+        self.start = datetime.utcnow().replace(second=0, microsecond=0)
+
+    def location(self, scenario):
+        if scenario.startswith("city"):
+            _, latitude, longitude = self.rng.choice(QUICK_CITIES)
+            return latitude, longitude
+        return round(self.rng.uniform(-60, 70), 4), round(self.rng.uniform(-180, 180), 4)
+
+    def next(self):
+        scenario = self.rng.choices(self.names, self.weights)[0]
+        latitude, longitude = self.location(scenario)
+        params = {"latitude": latitude, "longitude": longitude, **self.extra_params}
+        if scenario.endswith("_time"):
+            minute = self.start + timedelta(minutes=self.rng.randrange(24 * 60))
+            params["time"] = minute.isoformat()
+        return scenario, params
+
+
+def percentile(ordered, fraction):
+    """Nearest-rank percentile of an already sorted list"""
+    if not ordered:
+        return None
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize_latencies(latencies_ms):
+    ordered = sorted(latencies_ms)
+    return {
+        "p50": round(percentile(ordered, 0.50), 3) if ordered else None,
+        "p95": round(percentile(ordered, 0.95), 3) if ordered else None,
+        "p99": round(percentile(ordered, 0.99), 3) if ordered else None,
+        "max": round(ordered[-1], 3) if ordered else None,
+        "mean": round(sum(ordered) / len(ordered), 3) if ordered else None,
+    }
+
+
+async def run_stage(client, path, traffic, concurrency, duration):
+    """Run `concurrency` closed-loop clients for `duration` seconds and summarize the stage"""
+    records = []  # (scenario, latency ms, status code or exception name)
+    deadline = time.perf_counter() + duration
+
+    async def worker():
+        while time.perf_counter() < deadline:
+            scenario, params = traffic.next()
+            t0 = time.perf_counter()
+            try:
+                response = await client.get(path, params=params)
+                await response.aread()
+                outcome = response.status_code
+            except httpx.HTTPError as e:
+                outcome = type(e).__name__
+            records.append((scenario, (time.perf_counter() - t0) * 1000.0, outcome))
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    def is_error(outcome):
+        return not isinstance(outcome, int) or outcome >= 400
+
+    errors = sum(1 for _, _, outcome in records if is_error(outcome))
+    scenarios = {}
+    for name in traffic.names:
+        latencies = [latency for scenario, latency, _ in records if scenario == name]
+        scenario_errors = sum(1 for scenario, _, outcome in records if scenario == name and is_error(outcome))
+        scenarios[name] = {
+            "requests": len(latencies),
+            "errors": scenario_errors,
+            "latency_ms": summarize_latencies(latencies),
+        }
+    return {
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(records),
+        "throughput_rps": round(len(records) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": summarize_latencies([latency for _, latency, _ in records]),
+        "errors": errors,
+        "error_rate": round(errors / len(records), 5) if records else 0.0,
+        "status_codes": dict(Counter(str(outcome) for _, _, outcome in records)),
+        "scenarios": scenarios,
+    }
+
+
+async def run_load(client, args):
+    traffic = TrafficMix(args.mix, args.seed, extra_params=args.params)
+    stages = []
+    for concurrency in args.ramp:
+        stage = await run_stage(client, args.path, traffic, concurrency, args.duration)
+        latency = stage["latency_ms"]
+        print(
+            f"clients {concurrency:4d}  {stage['throughput_rps']:9.1f} req/s  "
+            f"p50 {latency['p50'] or 0:8.2f} ms  p95 {latency['p95'] or 0:8.2f} ms  "
+            f"p99 {latency['p99'] or 0:8.2f} ms  errors {stage['error_rate']:.2%}",
+            file=sys.stderr, flush=True,
+        )
+        stages.append(stage)
+    return stages
+
+
+async def run_in_process(args):
+    """Drive the app through an ASGI transport, after the warm-up the launcher would run"""
+    from app.main import app, warm_up
+    warm_up()
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=args.timeout) as client:
+        return await run_load(client, args)
+
+
+async def run_against(url, args):
+    limits = httpx.Limits(max_connections=max(args.ramp), max_keepalive_connections=max(args.ramp))
+    async with httpx.AsyncClient(base_url=url, timeout=args.timeout, limits=limits) as client:
+        return await run_load(client, args)
+
+
+def start_server(port, workers):
+    """Start the production launcher on localhost and wait until /health reports ready"""
+    command = [sys.executable, "-m", "app.launcher", "--host", "127.0.0.1", "--port", str(port)]
+    if workers is not None:
+        command += ["--workers", str(workers)]
+    process = subprocess.Popen(
+        command,
+        cwd=os.path.dirname(os.path.abspath(__file__)),
+        stdout=subprocess.DEVNULL,
+    )
+    deadline = time.monotonic() + SERVE_STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Server exited with status {process.returncode} during startup")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1.0).status_code == 200:
+                return process
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    stop_server(process)
+    raise RuntimeError(f"Server did not become healthy within {SERVE_STARTUP_TIMEOUT:.0f}s")
+
+
+def stop_server(process):
+    process.send_signal(signal.SIGTERM)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a traffic mix against /api/bright-objects")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--url", help="Base URL of a running server (default: the app in-process)")
+    target.add_argument("--serve", action="store_true", help="Start the launcher on localhost and load it")
+    parser.add_argument("--port", type=int, default=8765, help="Port for --serve")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for --serve (default: the launcher's)")
+    parser.add_argument("--ramp", type=parse_ramp, default=[1, 4, 16, 64],
+                        help="Comma-separated concurrent client counts, one stage each (default: 1,4,16,64)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per stage")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX),
+                        help=f"Scenario weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--path", default="/api/bright-objects", help="Endpoint to load")
+    parser.add_argument("--param", dest="param_pairs", type=parse_param, action="append", default=[], metavar="KEY=VALUE",
+                        help="Extra query parameter for every request, e.g. precision=fast (repeatable)")
+    parser.add_argument("--timeout", type=float, default=30.0, help="Per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=1, help="Seed for the traffic mix")
+    parser.add_argument("--output", metavar="PATH", help="Write the JSON report here instead of stdout")
+    args = parser.parse_args(argv)
+    args.params = dict(args.param_pairs)
+
+    if args.url:
+        target_name = args.url
+        stages = asyncio.run(run_against(args.url, args))
+    elif args.serve:
+        target_name = f"launcher on 127.0.0.1:{args.port}"
+        process = start_server(args.port, args.workers)
+        try:
+            stages = asyncio.run(run_against(f"http://127.0.0.1:{args.port}", args))
+        finally:
+            stop_server(process)
+    else:
+        target_name = "in-process"
+        stages = asyncio.run(run_in_process(args))
+
+    report = {
+        "meta": {
+            "timestamp": datetime.utcnow().isoformat() + "Z",
+            "target": target_name,
+            "workers": args.workers if args.serve else None,
+            "path": args.path,
+            "params": args.params,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "duration_per_stage_s": args.duration,
+            "mix": args.mix,
+            "seed": args.seed,
+        },
+        "stages": stages,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    return 1 if any(stage["requests"] == 0 for stage in stages) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
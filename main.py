@@ -18,14 +18,6 @@ except Exception as e:
     sys.exit(1)
 
 if __name__ == "__main__":
-    import uvicorn
-    port = int(os.environ.get("PORT", 8000))
-    print(f"Starting uvicorn on host 0.0.0.0 port {port}")
-    
-    uvicorn.run(
-        app, 
-        host="0.0.0.0", 
-        port=port,
-        access_log=True,
-        log_level="info"
-    )
\ No newline at end of file
+    # Preloads and warms up once, then forks WEB_CONCURRENCY workers
+    from app.launcher import main as launch
+    sys.exit(launch())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Accuracy of the fast analytical ephemeris against PyEphem
+
+Runs offline (no server needed): python -m pytest test_fast_ephemeris.py
+"""
+import math
+import sys
+
+import ephem
+import numpy as np
+
+from app.ephemeris import EPHEMERIS_BACKENDS, SOLAR_SYSTEM_BODIES, EphemerisCache, topocentric_positions
+
+# Largest allowed separation from PyEphem, in arcminutes. Jupiter and Saturn
+# (and Jupiter's moons with them) are limited by the JPL mean elements.
+POSITION_TOLERANCE = {
+    "Sun": 2.0, "Moon": 2.0, "Mercury": 4.0, "Venus": 4.0, "Mars": 4.0,
+    "Jupiter": 15.0, "Saturn": 15.0, "Uranus": 4.0, "Neptune": 4.0,
+    "Io": 15.0, "Europa": 15.0, "Ganymede": 15.0, "Callisto": 15.0,
+}
+MAGNITUDE_TOLERANCE = 0.4
+# Thin crescents (Mercury and Venus near inferior conjunction, a young Moon)
+# and bodies close to the Sun use different phase laws, and are lost in the
+# Sun's glare anyway
+MIN_ILLUMINATED_PERCENT = 20.0
+MIN_ELONGATION_DEGREES = 15.0
+DISTANCE_TOLERANCE = 0.005  # relative
+
+# PyEphem's own Galilean moon theory is unreliable after the late 2030s
+SAMPLE_START, SAMPLE_YEARS, SAMPLES = "1950/1/1", 85, 200
+
+
+def sample_dates():
+    rng = np.random.default_rng(2024)
+    start = float(ephem.Date(SAMPLE_START))
+    return [ephem.Date(start + offset) for offset in rng.uniform(0, SAMPLE_YEARS * 365.25, SAMPLES)]
+
+
+def snapshots():
+    dates = sample_dates()
+    fast = EPHEMERIS_BACKENDS["fast"].snapshots(dates)
+    precise = EPHEMERIS_BACKENDS["precise"].snapshots(dates)
+    return dates, fast, precise
+
+
+def separation_arcmin(ra1, dec1, ra2, dec2):
+    cos_sep = math.sin(dec1) * math.sin(dec2) + math.cos(dec1) * math.cos(dec2) * math.cos(ra1 - ra2)
+    return math.degrees(math.acos(min(1.0, cos_sep))) * 60.0
+
+
+def test_positions_match_pyephem():
+    """Geocentric RA/Dec of every body within its tolerance"""
+    dates, fast, precise = snapshots()
+    for date, a, b in zip(dates, fast, precise):
+        for i, name in enumerate(a.names):
+            error = separation_arcmin(a.ra[i], a.dec[i], b.ra[i], b.dec[i])
+            assert error <= POSITION_TOLERANCE[name], f"{name} at {date}: {error:.2f}' from PyEphem"
+
+
+def test_distances_match_pyephem():
+    """Earth distances agree, which keeps the Moon's parallax right"""
+    dates, fast, precise = snapshots()
+    for date, a, b in zip(dates, fast, precise):
+        for i, name in enumerate(a.names):
+            if math.isnan(b.distance[i]):
+                assert math.isnan(a.distance[i]), f"{name} should have no distance"
+                continue
+            error = abs(a.distance[i] / b.distance[i] - 1.0)
+            assert error <= DISTANCE_TOLERANCE, f"{name} at {date}: distance off by {error:.2%}"
+
+
+def test_magnitudes_match_pyephem():
+    """Visual magnitudes agree except for thin crescents and bodies near the Sun"""
+    dates = sample_dates()
+    fast = EPHEMERIS_BACKENDS["fast"].snapshots(dates)
+    for date, a in zip(dates, fast):
+        sun = ephem.Sun(date)
+        for i, (name, body_class, _) in enumerate(SOLAR_SYSTEM_BODIES):
+            body = body_class(date)
+            if not hasattr(body, "mag") or name == "Sun":
+                continue
+            if (body.phase < MIN_ILLUMINATED_PERCENT
+                    or math.degrees(ephem.separation(body, sun)) < MIN_ELONGATION_DEGREES):
+                continue
+            error = abs(a.magnitude[i] - body.mag)
+            assert error <= MAGNITUDE_TOLERANCE, f"{name} at {date}: magnitude {a.magnitude[i]:.2f} vs {body.mag:.2f}"
+
+
+def test_horizon_coordinates_match_pyephem():
+    """Topocentric altitude/azimuth through the shared observer transform"""
+    dates, fast, precise = snapshots()
+    rng = np.random.default_rng(7)
+    for date, a, b in zip(dates, fast, precise):
+        observer = ephem.Observer()
+        observer.lat = str(rng.uniform(-70, 70))
+        observer.lon = str(rng.uniform(-180, 180))
+        observer.date = date
+        fast_positions = topocentric_positions(a, observer)
+        precise_positions = topocentric_positions(b, observer)
+        for i, name in enumerate(a.names):
+            # Refraction is steep at the horizon, so compare where it is well behaved
+            if precise_positions.altitude[i] < 5.0:
+                continue
+            tolerance = POSITION_TOLERANCE[name] / 60.0
+            assert abs(fast_positions.altitude[i] - precise_positions.altitude[i]) <= tolerance, name
+            azimuth_error = (fast_positions.azimuth[i] - precise_positions.azimuth[i] + 180.0) % 360.0 - 180.0
+            scale = math.cos(math.radians(precise_positions.altitude[i]))
+            assert abs(azimuth_error) * scale <= tolerance, name
+
+
+def test_batch_matches_single_instants():
+    """Vectorizing over time does not change the results"""
+    dates = sample_dates()[:10]
+    backend = EPHEMERIS_BACKENDS["fast"]
+    batch = backend.snapshots(dates)
+    for date, snapshot in zip(dates, batch):
+        single = backend.snapshots([date])[0]
+        for field in ("ra", "dec", "magnitude", "distance"):
+            np.testing.assert_allclose(getattr(snapshot, field), getattr(single, field), rtol=0, atol=1e-9)
+
+
+class CountingBackend:
+    """The fast backend, recording how many instants each call asked for"""
+
+    name = "counting"
+    batch_size = 8
+
+    def __init__(self):
+        self.calls = []
+
+    def snapshots(self, dates):
+        self.calls.append(len(dates))
+        return EPHEMERIS_BACKENDS["fast"].snapshots(dates)
+
+
+def test_cache_prefetches_only_near_now():
+    """Misses near the current time fill batch_size buckets, others compute one"""
+    backend = CountingBackend()
+    cache = EphemerisCache(bucket_seconds=60.0, max_entries=32, backend=backend)
+    cache.snapshot(ephem.Date(ephem.now() - 10))
+    assert backend.calls == [1]
+    cache.snapshot(ephem.now())
+    assert backend.calls == [1, 8]
+    cache.snapshot(ephem.Date(ephem.now() + 5 * ephem.minute))
+    assert backend.calls == [1, 8]
+
+
+def test_cache_batch_makes_one_backend_call():
+    """A batch of times computes its distinct missing buckets in one call"""
+    backend = CountingBackend()
+    cache = EphemerisCache(bucket_seconds=60.0, max_entries=32, backend=backend)
+    dates = sample_dates()[:5]
+    snapshots = cache.snapshots(dates + dates)
+    assert backend.calls == [5]
+    assert all(first is second for first, second in zip(snapshots[:5], snapshots[5:]))
+    assert all(cached is snapshot for cached, snapshot in zip(cache.snapshots(dates), snapshots))
+    assert backend.calls == [5]
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test in (test_positions_match_pyephem, test_distances_match_pyephem, test_magnitudes_match_pyephem,
+                 test_horizon_coordinates_match_pyephem, test_batch_matches_single_instants,
+                 test_cache_prefetches_only_near_now, test_cache_batch_makes_one_backend_call):
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Sample counts of /api/sky-track ranges
+
+Runs offline (no server needed): python -m pytest test_sky_track.py
+"""
+import sys
+
+from app.utils import iter_sky_track, parse_observation_time, track_steps
+
+
+def test_exact_multiple_ranges_include_the_end():
+    """A range that is a whole number of steps is sampled at both ends"""
+    for start, end, step_minutes, expected in [
+        ("2026-01-15T18:00:00", "2026-01-15T19:00:00", 30, 3),
+        ("2026-01-15T20:00:00", "2026-01-15T21:00:00", 15, 5),
+        ("2026-01-15T00:00:00", "2026-01-16T00:00:00", 5, 289),
+        ("2026-01-15T20:00:00", "2026-01-15T20:01:00", 0.1, 11),
+        ("2026-01-15T20:00:00", "2026-01-15T20:00:00", 5, 1),
+    ]:
+        steps = track_steps(parse_observation_time(start), parse_observation_time(end), step_minutes * 60.0)
+        assert steps == expected, (start, end, step_minutes)
+
+
+def test_partial_steps_are_not_sampled():
+    """The last sample is the last whole step at or before the end"""
+    start = parse_observation_time("2026-01-15T20:00:00")
+    end = parse_observation_time("2026-01-15T20:59:59")
+    assert track_steps(start, end, 15 * 60.0) == 4
+
+
+def test_every_sweep_count_is_exact():
+    """Whole-minute ranges and steps give span // step + 1 samples"""
+    start = parse_observation_time("2026-01-15T18:00:00")
+    for minutes in range(0, 24 * 60, 7):
+        end = start + minutes / 1440.0
+        for step in (1, 2, 3, 5, 7, 10, 15, 30, 60):
+            assert track_steps(start, end, step * 60.0) == minutes // step + 1, (minutes, step)
+
+
+def test_track_streams_the_end_sample():
+    """The stream itself carries the end sample, with either engine"""
+    for precision in ("precise", "fast"):
+        records = list(iter_sky_track(
+            51.5, -0.12, parse_observation_time("2026-01-15T18:00:00"), parse_observation_time("2026-01-15T19:00:00"),
+            30 * 60.0, ["Venus"], precision=precision,
+        ))
+        assert [record["time"] for record in records] == [
+            "2026-01-15T18:00:00Z", "2026-01-15T18:30:00Z", "2026-01-15T19:00:00Z"
+        ], precision
+
+
+if __name__ == "__main__":
+    failed = 0
+    for test in (test_exact_multiple_ranges_include_the_end, test_partial_steps_are_not_sampled,
+                 test_every_sweep_count_is_exact, test_track_streams_the_end_sample):
+        try:
+            test()
+            print(f"PASS {test.__name__}")
+        except AssertionError as e:
+            failed += 1
+            print(f"FAIL {test.__name__}: {e}")
+    sys.exit(1 if failed else 0)